@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Compares the python (`SortPlan`) and NumPy (`NumpySortPlan`) sorting of flat results.
+
+    python benchmarks/sorting.py --rows 200000 --repeat 5
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drf_multiple_model.sorting import NumpySortPlan, SortPlan, numpy  # noqa: E402
+
+
+SORTING_FIELDS = {
+    'int': [('year', False)],
+    'str': [('title', False)],
+    'mixed': [('author__name', False), ('year', True), ('title', False)],
+    'desc str': [('title', True), ('year', False)],
+}
+
+
+def get_results(rows):
+    """
+    Serialized-looking data from a few models, with a nested author
+    """
+    authors = [{'name': ''.join(random.choice(string.ascii_letters) for _ in range(8))} for _ in range(50)]
+
+    return [
+        {
+            'title': ''.join(random.choice(string.ascii_letters) for _ in range(16)),
+            'year': random.randint(1500, 2000),
+            'author': random.choice(authors),
+            'type': random.choice(['Play', 'Poem', 'Novel']),
+        }
+        for _ in range(rows)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=20, help='window for the partial (top-K) sort')
+    args = parser.parse_args()
+
+    if numpy is None:
+        sys.exit('NumPy is not installed')
+
+    random.seed(0)
+    results = get_results(args.rows)
+
+    print('{} rows, best of {}'.format(args.rows, args.repeat))
+    print('{:<10} {:>12} {:>12} {:>8}'.format('fields', 'python', 'numpy', 'speedup'))
+
+    for name, sorting_fields in SORTING_FIELDS.items():
+        for label, method, call_args in (('', 'sort', ()), (' top-K', 'select', (args.limit,))):
+            python_plan, numpy_plan = SortPlan(sorting_fields), NumpySortPlan(sorting_fields)
+
+            expected = getattr(python_plan, method)(results, *call_args)
+            assert getattr(numpy_plan, method)(results, *call_args) == expected
+
+            timings = [
+                min(timeit.repeat(
+                    lambda: getattr(plan, method)(results, *call_args), number=1, repeat=args.repeat
+                ))
+                for plan in (python_plan, numpy_plan)
+            ]
+            print('{:<10} {:>11.1f}ms {:>11.1f}ms {:>7.1f}x'.format(
+                name + label, timings[0] * 1000, timings[1] * 1000, timings[0] / timings[1]
+            ))
+
+
+if __name__ == '__main__':
+    main()
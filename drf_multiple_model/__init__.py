@@ -5,3 +5,9 @@ __copyright__ = 'Copyright 2015-2018 Matt Nishi-Broach'
 
 # Version synonym
 VERSION = __version__
+
+import django
+
+# Django < 3.2 doesn't pick up the AppConfig automatically (and warns about `default_app_config` since)
+if django.VERSION < (3, 2):
+    default_app_config = 'drf_multiple_model.apps.MultipleModelConfig'
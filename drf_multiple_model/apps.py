@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.core import checks
+
+
+class MultipleModelConfig(AppConfig):
+    name = 'drf_multiple_model'
+
+    def ready(self):
+        from drf_multiple_model.checks import check_querylists
+
+        # Static querylists are checked (and compiled) at startup, which also starts watching
+        # the models of cached views for changes
+        checks.register(check_querylists, checks.Tags.urls)
@@ -0,0 +1,69 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db.models.signals import post_delete, post_save
+
+VERSION_KEY = 'drf_multiple_model:version:{}'
+
+# The aliases of the caches holding a version of each (concrete) model
+watched_models = defaultdict(set)
+
+
+def get_version_key(model):
+    return VERSION_KEY.format(model._meta.concrete_model._meta.label_lower)
+
+
+def watch_models(models, alias=DEFAULT_CACHE_ALIAS):
+    """
+    Keeps the versions of the given models in the `alias` cache up to date, by connecting
+    the `post_save`/`post_delete` receivers for each model (and its proxies) the first time
+    """
+    for model in models:
+        concrete_model = model._meta.concrete_model
+        if alias in watched_models[concrete_model]:
+            continue
+
+        if not watched_models[concrete_model]:
+            # Signals are sent by the class of the saved object, which may be a proxy
+            for sender in apps.get_models():
+                if sender._meta.concrete_model is concrete_model:
+                    post_save.connect(invalidate_model, sender=sender)
+                    post_delete.connect(invalidate_model, sender=sender)
+
+        watched_models[concrete_model].add(alias)
+
+
+def get_model_versions(models, alias=DEFAULT_CACHE_ALIAS):
+    """
+    Returns the current version of each model in the `alias` cache, as a list.  Any model's
+    version is bumped whenever one of its objects is saved or deleted, so including these
+    versions in a cache key invalidates the cached value
+    """
+    watch_models(models, alias)
+
+    cache = caches[alias]
+    keys = [get_version_key(model) for model in models]
+
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # `add` won't overwrite a version set (or bumped) in the meantime
+            cache.add(key, 1, None)
+            versions[key] = cache.get(key, 1)
+
+    return [versions[key] for key in keys]
+
+
+def invalidate_model(sender, **kwargs):
+    """
+    `post_save`/`post_delete` receiver that bumps the versions of the sender's model
+    """
+    key = get_version_key(sender)
+
+    for alias in watched_models.get(sender._meta.concrete_model, ()):
+        try:
+            caches[alias].incr(key)
+        except ValueError:
+            # Nothing has been cached for this model yet
+            pass
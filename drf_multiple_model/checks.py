@@ -0,0 +1,42 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.checks import Error
+from django.core.exceptions import ValidationError
+from django.urls import URLResolver, get_resolver
+
+from drf_multiple_model.mixins import BaseMultipleModelMixin
+
+
+def get_view_classes(patterns):
+    """
+    Yields the multiple model view (and viewset) classes routed by the given url patterns
+    """
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            for view_class in get_view_classes(pattern.url_patterns):
+                yield view_class
+            continue
+
+        # Rest Framework's `as_view()` keeps the class around
+        view_class = getattr(pattern.callback, 'cls', None)
+        if isinstance(view_class, type) and issubclass(view_class, BaseMultipleModelMixin):
+            yield view_class
+
+
+def check_querylists(app_configs=None, **kwargs):
+    """
+    Compiles the static querylists of every routed multiple model view up front, so that
+    invalid querylists are reported at startup rather than on the first request
+    """
+    if not getattr(settings, 'ROOT_URLCONF', None):
+        return []
+
+    errors = []
+    for view_class in OrderedDict.fromkeys(get_view_classes(get_resolver().url_patterns)):
+        try:
+            view_class().get_querylist_plan()
+        except ValidationError as error:
+            errors.append(Error(error.messages[0], obj=view_class, id='drf_multiple_model.E001'))
+
+    return errors
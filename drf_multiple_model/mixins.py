@@ -1,8 +1,63 @@
+import asyncio
+import copy
+import functools
+import hashlib
+import heapq
+import itertools
 import warnings
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 
-from django.core.exceptions import ValidationError
-from django.db.models.query import QuerySet
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import FieldDoesNotExist, FieldError, ValidationError
+from django.db import connections, models
+from django.db.models.query import QuerySet, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.serializer_helpers import ReturnList
+
+from drf_multiple_model.cache import get_model_versions, watch_models
+from drf_multiple_model.optimization import get_loaded_fields, get_related_lookups, inspect_serializer
+from drf_multiple_model.renderers import MultipleModelCSVRenderer, MultipleModelNDJSONRenderer
+from drf_multiple_model.sorting import SortPlan
+
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # Django < 3.0
+    async_to_sync = sync_to_async = None
+
+
+# Name under which the pk of `values` items is selected
+VALUES_PK = 'multiple_model_pk'
+VALUES_ALIAS = 'multiple_model_value_{}'
+
+
+class QuerylistPlan(object):
+    """
+    A static querylist, checked and compiled once per view class: its (read-only) items,
+    their labels (unless `get_label` is overridden) and anything else that doesn't depend
+    on the request.  `sources` are the class attributes it was compiled from
+    """
+    def __init__(self, sources, querylist, labels=None):
+        self.sources = sources
+        self.querylist = querylist
+        self.labels = labels
+
+        # The labels by item, for looking them up while evaluating the items
+        self.item_labels = None if labels is None else dict(zip(map(id, querylist), labels))
+
+        # Parsed `sorting_fields` of flat views
+        self.sorting_fields = None
+
+    def is_compiled_from(self, sources):
+        return len(sources) == len(self.sources) and all(
+            source is compiled for source, compiled in zip(sources, self.sources)
+        )
 
 
 class BaseMultipleModelMixin(object):
@@ -17,6 +72,52 @@ class BaseMultipleModelMixin(object):
     # default pagination state. Gets overridden if pagination is active
     is_paginated = False
 
+    # If set, querylist items are loaded and serialized concurrently on a thread pool
+    # with (at most) this many workers
+    max_workers = None
+
+    # If set, response data is cached (in the `cache_alias` cache) for this many seconds.  Cached
+    # responses are invalidated when any object of a querylist model is saved or deleted.
+    # Querylist items can list other models their serializers depend on under `cache_models`
+    cache_timeout = None
+    cache_alias = 'default'
+    cache_per_user = False
+
+    # If set, each querylist item's (filtered, paginated and serialized) data is cached separately
+    # for this many seconds, and only invalidated by changes to that item's models.  Querylist items
+    # can override it with a `cache_timeout` key (None disables caching for that item)
+    item_cache_timeout = None
+
+    # If set, the serialized representation of each object is cached for this many seconds, so that
+    # only new or changed objects are serialized.  Only applies to querylist items that name a
+    # `cache_version_field` (e.g. an `updated_at` field), which is part of each object's cache key
+    object_cache_timeout = None
+
+    # If True, each querylist item's serializer is inspected to add the `select_related` and
+    # `prefetch_related` lookups it needs.  Querylist items can override it with an
+    # `optimize_related` key.  In DEBUG mode, a warning is raised for serializers that
+    # still run queries for each object
+    optimize_related = False
+
+    # Clients can ask for some of the fields of a label with `?fields[<label>]=<field>,<field>`.
+    # The other fields are left out of the serializer (and, where possible, of the queryset)
+    sparse_fields_parameter_name = 'fields'
+
+    # Clients can limit the response to some of the labels with `?types=<label>,<label>`.  The
+    # querysets of other labels aren't evaluated (or counted) at all
+    types_parameter_name = 'types'
+
+    # If True, querysets only load the fields their item's serializer reads (with `.only()`).
+    # Querylist items can override it with an `optimize_columns` key, or list the fields to load
+    # (or not to load) themselves under `only` (or `defer`)
+    optimize_columns = False
+
+    # If True, unpaginated responses rendered by `MultipleModelJSONRenderer` are streamed: each
+    # queryset is iterated (with `.iterator()`) in chunks of `streaming_chunk_size` rows, which are
+    # serialized and encoded one chunk at a time
+    streaming = False
+    streaming_chunk_size = 2000
+
     def get_querylist(self):
         assert self.querylist is not None, (
             '{} should either include a `querylist` attribute, '
@@ -27,13 +128,113 @@ class BaseMultipleModelMixin(object):
 
         return self.querylist
 
+    def get_plan_sources(self):
+        """
+        Returns the class attributes that the querylist plan is compiled from.  The plan is
+        compiled again whenever one of them is replaced
+        """
+        cls = type(self)
+
+        return (cls.querylist, cls.required_keys)
+
+    def has_static_querylist(self):
+        """
+        The querylist is static if it is a list or tuple on the class, rather than coming
+        from `get_querylist()`, a property or the view's initkwargs
+        """
+        cls = type(self)
+
+        return (
+            cls.get_querylist is BaseMultipleModelMixin.get_querylist and
+            'querylist' not in self.__dict__ and
+            isinstance(cls.querylist, (list, tuple))
+        )
+
+    def get_querylist_plan(self):
+        """
+        Returns the compiled plan of a static querylist (compiling it for the view class the
+        first time), or None if the querylist isn't static
+        """
+        if not self.has_static_querylist():
+            return None
+
+        cls = type(self)
+        plan = cls.__dict__.get('_querylist_plan')
+        if plan is None or not plan.is_compiled_from(self.get_plan_sources()):
+            plan = cls._querylist_plan = self.compile_querylist_plan()
+
+        return plan
+
+    def compile_querylist_plan(self):
+        """
+        Checks every querylist item, and compiles them into a `QuerylistPlan`
+        """
+        for query_data in self.querylist:
+            self.check_query_data(query_data)
+
+        querylist = tuple(MappingProxyType(dict(query_data)) for query_data in self.querylist)
+
+        # Changes to the models are watched from the start, see `drf_multiple_model.cache`
+        if self.caches_data(querylist):
+            watch_models(self.get_cache_models(querylist), self.cache_alias)
+
+        # Overridden `get_label` methods might depend on the request
+        labels = None
+        if getattr(type(self).get_label, '__module__', None) == __name__:
+            labels = tuple(self.get_label(query_data['queryset'], query_data) for query_data in querylist)
+
+        return QuerylistPlan(self.get_plan_sources(), querylist, labels)
+
+    def get_requested_querylist(self):
+        """
+        Returns the querylist items whose labels were requested with the types parameter
+        (e.g. `?types=Play,Poem`), or the whole querylist if no types were requested
+        """
+        plan = self._request_plan = self.get_querylist_plan()
+        querylist = self.get_querylist() if plan is None else plan.querylist
+
+        if self.types_parameter_name is None or self.types_parameter_name not in self.request.query_params:
+            return querylist
+
+        types = [label.strip() for label in self.request.query_params[self.types_parameter_name].split(',')]
+
+        if plan is not None and plan.labels is not None:
+            return tuple(query_data for query_data, label in zip(querylist, plan.labels) if label in types)
+
+        requested = []
+        for query_data in querylist:
+            self.check_query_data(query_data)
+            if self.get_label(query_data['queryset'], query_data) in types:
+                requested.append(query_data)
+
+        return requested
+
+    def get_item_label(self, queryset, query_data):
+        """
+        Returns the label of a querylist item, taken from the querylist plan of the request
+        (when compiled with the labels) rather than calling `get_label` at every step
+        """
+        plan = getattr(self, '_request_plan', None)
+        if plan is not None and plan.item_labels is not None and id(query_data) in plan.item_labels:
+            return plan.item_labels[id(query_data)]
+
+        return self.get_label(queryset, query_data)
+
     def check_query_data(self, query_data):
         """
         All items in a `querylist` must at least have `queryset` key and a
         `serializer_class` key. Any querylist item lacking both those keys
-        will raise a ValidationError
+        will raise a ValidationError.  Items with `values` don't need a serializer
         """
-        for key in self.required_keys:
+        if isinstance(query_data, MappingProxyType):
+            # Items of a compiled querylist plan have already been checked
+            return
+
+        required_keys = self.required_keys
+        if 'values' in query_data:
+            required_keys = [key for key in required_keys if key != 'serializer_class']
+
+        for key in required_keys:
             if key not in query_data:
                 raise ValidationError(
                     'All items in the {} querylist attribute should contain a '
@@ -41,6 +242,22 @@ class BaseMultipleModelMixin(object):
                 )
 
     def load_queryset(self, query_data, request, *args, **kwargs):
+        """
+        Fetches the filtered queryset and paginates it, if pagination is active
+        """
+        queryset = self.get_filtered_queryset(query_data, request, *args, **kwargs)
+
+        if hasattr(self.paginator, 'paginate_labeled_queryset'):
+            # Paginators that page each label on its own need to know the label
+            label = self.get_item_label(queryset, query_data)
+            page = self.paginator.paginate_labeled_queryset(queryset, label, request, view=self)
+        else:
+            page = self.paginate_queryset(queryset)
+        self.is_paginated = page is not None
+
+        return page if page is not None else queryset
+
+    def get_filtered_queryset(self, query_data, request, *args, **kwargs):
         """
         Fetches the queryset and runs any necessary filtering, both
         built-in rest_framework filters and custom filters passed into
@@ -58,12 +275,177 @@ class BaseMultipleModelMixin(object):
         # run custom filters
         filter_fn = query_data.get('filter_fn', None)
         if filter_fn is not None:
+            if asyncio.iscoroutinefunction(filter_fn):
+                filter_fn = async_to_sync(filter_fn)
             queryset = filter_fn(queryset, request, *args, **kwargs)
 
-        page = self.paginate_queryset(queryset)
-        self.is_paginated = page is not None
+        label = self.get_item_label(queryset, query_data)
 
-        return page if page is not None else queryset
+        if self.optimizes_related(query_data) and isinstance(queryset, QuerySet):
+            queryset = self.optimize_related_queryset(queryset, query_data, label)
+
+        if 'values' not in query_data and isinstance(queryset, QuerySet):
+            queryset = self.prune_columns(queryset, query_data, label)
+
+        queryset = self.prepare_queryset(queryset, query_data)
+
+        if 'values' in query_data and isinstance(queryset, QuerySet):
+            queryset = self.get_values_queryset(queryset, query_data, label)
+
+        return queryset
+
+    def optimizes_related(self, query_data):
+        # `values` items don't load any related objects
+        return 'values' not in query_data and query_data.get('optimize_related', self.optimize_related)
+
+    def get_sparse_fields(self, label):
+        """
+        Returns the fields requested for a label with the sparse fields parameter, or None
+        """
+        if self.sparse_fields_parameter_name is None or label is None:
+            return None
+
+        fields = self.request.query_params.get('{}[{}]'.format(self.sparse_fields_parameter_name, label))
+        if fields is None:
+            return None
+
+        return [field.strip() for field in fields.split(',') if field.strip()]
+
+    def get_item_serializer_context(self):
+        """
+        Returns the serializer context, which is the same for every querylist item, so it is
+        only built once per request
+        """
+        try:
+            return self._item_serializer_context
+        except AttributeError:
+            self._item_serializer_context = self.get_serializer_context()
+            return self._item_serializer_context
+
+    def get_item_serializer(self, query_data, label, instances=None):
+        """
+        Instantiates the item's serializer (for a list of instances, if given), without the
+        fields left out of the sparse fieldset requested for the label
+        """
+        context = self.get_item_serializer_context()
+        if instances is None:
+            serializer = query_data['serializer_class'](context=context)
+        else:
+            serializer = query_data['serializer_class'](instances, many=True, context=context)
+
+        sparse_fields = self.get_sparse_fields(label)
+        if sparse_fields is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in list(fields):
+                if name not in sparse_fields:
+                    fields.pop(name)
+
+        return serializer
+
+    def inspect_item_serializer(self, inspect, query_data, label, model):
+        """
+        Runs an inspection of the item's serializer (see `drf_multiple_model.optimization`), which
+        only depends on the serializer class, the model and the sparse fieldset, so it is memoized
+        rather than building and walking the serializer on every request
+        """
+        sparse_fields = self.get_sparse_fields(label)
+        key = (query_data['serializer_class'], None if sparse_fields is None else frozenset(sparse_fields))
+
+        return inspect_serializer(inspect, key, lambda: self.get_item_serializer(query_data, label), model)
+
+    def optimize_related_queryset(self, queryset, query_data, label):
+        """
+        Adds the `select_related` and `prefetch_related` lookups needed by the item's serializer
+        """
+        select_related, prefetch_related = self.inspect_item_serializer(
+            get_related_lookups, query_data, label, queryset.model
+        )
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
+
+    def prune_columns(self, queryset, query_data, label):
+        """
+        Applies the item's `only` and `defer` fields or, when optimizing columns (or when a sparse
+        fieldset was requested), limits the queryset to the fields its serializer reads (if those
+        can be told)
+        """
+        optimize_columns = query_data.get('optimize_columns', self.optimize_columns)
+
+        if 'only' in query_data:
+            queryset = queryset.only(*query_data['only'])
+        elif optimize_columns or self.get_sparse_fields(label) is not None:
+            fields = self.get_loaded_fields(queryset, query_data, label)
+            if fields is not None:
+                queryset = queryset.only(*fields)
+
+        if 'defer' in query_data:
+            queryset = queryset.defer(*query_data['defer'])
+
+        return queryset
+
+    def get_loaded_fields(self, queryset, query_data, label):
+        """
+        Returns the fields the item's serializer reads, plus the fields the queryset follows with
+        `select_related` and the object cache's version field, or None if they can't be told
+        """
+        if queryset.query.select_related is True:
+            # Every relation is followed, so every foreign key is needed
+            return None
+
+        fields = self.inspect_item_serializer(get_loaded_fields, query_data, label, queryset.model)
+        if fields is None:
+            return None
+
+        extra_fields = list(queryset.query.select_related or [])
+        if query_data.get('cache_version_field'):
+            extra_fields.append(query_data['cache_version_field'])
+
+        return fields + [field for field in extra_fields if field not in fields]
+
+    def get_values_queryset(self, queryset, query_data, label):
+        """
+        Turns the queryset into a `values()` queryset for items with `values`: either a list of
+        field names (or lookups), or a dict of {name in the results: field name or lookup}.
+        The pk is always selected as well (for cursor pagination), but left out of the results
+        """
+        columns = self.get_values_columns(query_data)
+
+        sparse_fields = self.get_sparse_fields(label)
+        if sparse_fields is not None:
+            columns = [(name, column, lookup) for name, column, lookup in columns if name in sparse_fields]
+
+        fields = [column for name, column, lookup in columns if column == lookup]
+        expressions = dict((column, models.F(lookup)) for name, column, lookup in columns if column != lookup)
+        expressions[VALUES_PK] = models.F('pk')
+
+        return queryset.values(*fields, **expressions)
+
+    def get_values_columns(self, query_data):
+        """
+        Returns a (name in the results, selected column, lookup) tuple for each of the values of a
+        `values` item.  Renamed lookups are selected under internal aliases, since their names in
+        the results may clash with model fields (e.g. `{'title': 'genre', 'genre': 'title'}`)
+        """
+        values = query_data['values']
+        if not isinstance(values, dict):
+            values = dict((field, field) for field in values)
+
+        return [
+            (name, lookup if name == lookup else VALUES_ALIAS.format(index), lookup)
+            for index, (name, lookup) in enumerate(values.items())
+        ]
+
+    def prepare_queryset(self, queryset, query_data):
+        """
+        hook for adjusting a querylist item's queryset (e.g. ordering) once it
+        has been filtered, but before it is paginated and evaluated
+        """
+        return queryset
 
     def get_empty_results(self):
         """
@@ -76,48 +458,490 @@ class BaseMultipleModelMixin(object):
             '`get_empty_result` method.'.format(self.__class__.__name__)
         )
 
-        return self.result_type()
+        return self.result_type()
+
+    def add_to_results(self, data, label, results):
+        """
+        responsible for updating the running `results` variable with the
+        data from this queryset/serializer combo
+        """
+        raise NotImplementedError(
+            '{} must specify how to add data to the running results tally '
+            'by overriding the `add_to_results` method.'.format(
+                self.__class__.__name__
+            )
+        )
+
+    def format_results(self, results, request):
+        """
+        hook for processing/formatting the entire returned data set, once
+        the querylist has been evaluated
+        """
+        return results
+
+    def evaluate_query_data(self, query_data, request, *args, **kwargs):
+        """
+        Loads and serializes a single querylist item, returning its data and label
+        """
+        self.check_query_data(query_data)
+
+        cache_timeout = self.get_item_cache_timeout(query_data)
+        if cache_timeout is not None:
+            cache = caches[self.cache_alias]
+            cache_key = self.get_item_cache_key(query_data, request)
+
+            cached = cache.get(cache_key)
+            if cached is not None:
+                data, label, state = cached
+                self.restore_item_state(state, request)
+                return data, label
+
+        queryset = self.load_queryset(query_data, request, *args, **kwargs)
+
+        label = self.get_item_label(queryset, query_data)
+
+        # Run the paired serializer
+        if settings.DEBUG and self.optimizes_related(query_data):
+            data = self.check_related_queries(queryset, query_data, label)
+        else:
+            data = self.get_serialized_data(queryset, query_data, label)
+
+        if cache_timeout is not None:
+            cache.set(cache_key, (data, label, self.get_item_state()), cache_timeout)
+
+        return data, label
+
+    def check_related_queries(self, queryset, query_data, label):
+        """
+        Serializes the queryset, warning if the serializer ran (at least) one query per object
+        """
+        instances = list(queryset)
+        connection = connections[query_data['queryset'].db]
+
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            data = self.get_serialized_data(instances, query_data, label)
+
+        if instances and len(queries) >= len(instances):
+            warnings.warn(
+                '{} ran {} queries while serializing {} {} objects with {}. Consider adding the related '
+                'lookups it needs to the queryset.'.format(
+                    self.__class__.__name__, len(queries), len(instances), query_data['queryset'].model.__name__,
+                    query_data['serializer_class'].__name__,
+                ),
+                RuntimeWarning
+            )
+
+        return data
+
+    def get_serialized_data(self, queryset, query_data, label):
+        """
+        Serializes the (loaded) queryset with the item's serializer.  With object caching, cached
+        representations are fetched in bulk and only the remaining objects are serialized.
+        Representations are pre-encoded if the accepted renderer supports it
+        """
+        encode = self.encodes_data()
+
+        if 'values' in query_data:
+            data = self.get_values_data(queryset, query_data)
+            if encode:
+                data[:] = self.encode_data(data, label)
+            return data
+
+        if self.object_cache_timeout is None or query_data.get('cache_version_field') is None:
+            data = self.get_item_serializer(query_data, label, queryset).data
+            return ReturnList(self.encode_data(data, label), serializer=data.serializer) if encode else data
+
+        instances = list(queryset)
+        cache = caches[self.cache_alias]
+
+        keys = [self.get_object_cache_key(instance, query_data, label) for instance in instances]
+        cached = cache.get_many(keys)
+
+        missing = [index for index, key in enumerate(keys) if key not in cached]
+        if missing:
+            serialized = self.get_item_serializer(query_data, label, [instances[index] for index in missing]).data
+            if encode:
+                serialized = self.encode_data(serialized, label)
+
+            fresh = {keys[index]: datum for index, datum in zip(missing, serialized)}
+            cache.set_many(fresh, self.object_cache_timeout)
+            cached.update(fresh)
+
+        # Keep a serializer around, as with regular serializer data
+        serializer = self.get_item_serializer(query_data, label, instances)
+        return ReturnList([cached[key] for key in keys], serializer=serializer)
+
+    def get_values_data(self, queryset, query_data):
+        """
+        Returns the rows of a `values` item as they are, or passed through its `transform`
+        function.  Their pks are kept on the result as `pks`
+        """
+        rows = list(queryset)
+        pks = [row.pop(VALUES_PK) for row in rows]
+
+        # Renamed lookups are given their names in the results
+        columns = self.get_values_columns(query_data)
+        if any(name != column for name, column, lookup in columns):
+            rows = [dict((name, row[column]) for name, column, lookup in columns if column in row) for row in rows]
+
+        transform = query_data.get('transform')
+        if transform is not None:
+            rows = [transform(row) for row in rows]
+
+        data = ReturnList(rows, serializer=None)
+        data.pks = pks
+
+        return data
+
+    def get_object_cache_key(self, instance, query_data, label):
+        """
+        Builds the key for caching the representation of a single object, from its serializer
+        (and sparse fieldset), model, pk and version (and the user, if `cache_per_user`).
+        Pre-encoded representations include the label, so they are cached for each label
+        """
+        serializer_class = query_data['serializer_class']
+        key = [
+            serializer_class.__module__,
+            serializer_class.__name__,
+            self.get_sparse_fields(label),
+            instance._meta.label_lower,
+            instance.pk,
+            getattr(instance, query_data['cache_version_field']),
+            self.request.user.pk if self.cache_per_user else None,
+            label if self.encodes_data() else None,
+        ]
+
+        return 'drf_multiple_model:object:{}'.format(hashlib.md5(repr(key).encode('utf-8')).hexdigest())
+
+    def encodes_data(self):
+        """
+        Data is pre-encoded if the accepted renderer can splice pre-encoded data into the response
+        (see `drf_multiple_model.renderers.MultipleModelJSONRenderer`)
+        """
+        return hasattr(getattr(self.request, 'accepted_renderer', None), 'encode_datum')
+
+    def encode_data(self, data, label):
+        """
+        Pre-encodes each serialized datum with the accepted renderer
+        """
+        renderer = self.request.accepted_renderer
+
+        return [renderer.encode_datum(datum) for datum in data]
+
+    def get_item_cache_timeout(self, query_data):
+        """
+        Returns how long to cache a querylist item's data for, or None if it isn't cached.
+        Items are only cached if the paginator (if any) can restore its state for a cached page
+        """
+        cache_timeout = query_data.get('cache_timeout', self.item_cache_timeout)
+
+        if self.paginator is not None and not hasattr(self.paginator, 'restore_item_state'):
+            return None
+
+        return cache_timeout
+
+    def get_cache_models(self, querylist):
+        """
+        Returns the models whose changes invalidate the cached data of the querylist items
+        """
+        models = []
+        for query_data in querylist:
+            models.append(query_data['queryset'].model)
+            models.extend(query_data.get('cache_models', []))
+
+        return models
+
+    def caches_data(self, querylist):
+        """
+        Whether responses or any of the querylist items are cached
+        """
+        return self.cache_timeout is not None or any(
+            query_data.get('cache_timeout', self.item_cache_timeout) is not None for query_data in querylist
+        )
+
+    def get_item_cache_key(self, query_data, request):
+        """
+        Builds the key for caching a single querylist item's data, which only depends on
+        the cache versions of that item's models
+        """
+        queryset = query_data['queryset']
+        label = self.get_item_label(queryset, query_data)
+        models = self.get_cache_models([query_data])
+
+        return self.make_cache_key('item', request, self.get_item_cache_params(label, request), label, models)
+
+    def get_label_parameters(self, label):
+        """
+        Returns the names of the query parameters that only apply to the given label, i.e. its
+        sparse fields and, with per-label pagination, its limit and offset
+        """
+        names = []
+        if self.sparse_fields_parameter_name is not None:
+            names.append('{}[{}]'.format(self.sparse_fields_parameter_name, label))
+
+        if hasattr(self.paginator, 'get_label_query_params'):
+            names.extend(self.paginator.get_label_query_params(label))
+
+        return names
+
+    def get_item_cache_params(self, label, request):
+        """
+        Returns the query parameters that an item's cached data depends on: everything but the
+        types parameter and the parameters of the other labels
+        """
+        plan = self.get_querylist_plan()
+        if plan is not None and plan.labels is not None:
+            labels = plan.labels
+        else:
+            labels = [self.get_label(query_data['queryset'], query_data) for query_data in self.get_querylist()]
+
+        ignored = set([self.types_parameter_name])
+        for other_label in labels:
+            if other_label != label:
+                ignored.update(self.get_label_parameters(other_label))
+
+        return sorted((name, values) for name, values in request.query_params.lists() if name not in ignored)
+
+    def get_item_state(self):
+        """
+        Returns the pagination state of the item that was just evaluated, to be cached with its data
+        """
+        if not self.is_paginated:
+            return None
+
+        return self.paginator.get_item_state()
+
+    def restore_item_state(self, state, request):
+        """
+        Restores the pagination state for an item whose data was loaded from the cache
+        """
+        self.is_paginated = state is not None
+
+        if state is not None:
+            self.paginator.restore_item_state(state, request)
+
+    def _evaluate_in_thread(self, query_data, request, *args, **kwargs):
+        try:
+            evaluated = self.evaluate_query_data(query_data, request, *args, **kwargs)
+
+            # Count while still in the worker thread, rather than serially once every item is evaluated
+            if self.paginator is not None and hasattr(self.paginator, 'count_item_querysets'):
+                self.paginator.count_item_querysets()
+
+            return evaluated
+        finally:
+            # Worker threads get their own database connections, which would otherwise leak
+            connections.close_all()
+
+    def evaluate_querylist(self, querylist, request, *args, **kwargs):
+        """
+        Evaluates every querylist item, returning a list of (data, label) pairs in querylist order.
+        When running concurrently, each item is evaluated by a copy of the view with its own
+        paginator, whose state is then combined into the view's paginator in querylist order
+        """
+        if not self.max_workers or len(querylist) < 2:
+            return [self.evaluate_query_data(query_data, request, *args, **kwargs) for query_data in querylist]
+
+        item_views = self.get_item_views(querylist)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(item_view._evaluate_in_thread, query_data, request, *args, **kwargs)
+                for item_view, query_data in zip(item_views, querylist)
+            ]
+            evaluated = [future.result() for future in futures]
+
+        self.combine_item_views(item_views)
+
+        return evaluated
+
+    def get_item_views(self, querylist):
+        """
+        Creates a copy of the view (with its own paginator) for each querylist item, so that
+        items can be evaluated concurrently
+        """
+        item_views = []
+        for query_data in querylist:
+            item_view = copy.copy(self)
+            item_view._paginator = copy.copy(self.paginator)
+            item_views.append(item_view)
+
+        return item_views
+
+    def combine_item_views(self, item_views):
+        """
+        Combines the pagination state of the item views back into the view, in querylist order
+        """
+        if self.paginator is not None:
+            if not hasattr(self.paginator, 'combine'):
+                raise NotImplementedError(
+                    "{} cannot evaluate its querylist concurrently with a paginator that lacks the "
+                    "`combine` method. Use one of the included paginators from `drf_multiple_models.pagination`."
+                    "".format(self.__class__.__name__)
+                )
+
+            for item_view in item_views:
+                self.paginator.combine(item_view.paginator)
+
+        if item_views:
+            self.is_paginated = item_views[-1].is_paginated
+
+    def initialize_list(self, request):
+        """
+        hook for setting up any per-request state before the querylist is evaluated
+        """
+        pass
+
+    def collect_results(self, evaluated):
+        """
+        Adds the (data, label) pairs of the evaluated querylist to the results, in order
+        """
+        results = self.get_empty_results()
+
+        for data, label in evaluated:
+            # Add the serializer data to the running results tally
+            results = self.add_to_results(data, label, results)
+
+        return results
+
+    def make_cache_key(self, prefix, request, params, labels, models, *extra):
+        """
+        Builds a cache key from the view, the given labels and query parameters, the url kwargs,
+        the user (if `cache_per_user`) and the cache versions of the given models
+        """
+        key = [
+            self.__class__.__module__,
+            self.__class__.__name__,
+            labels,
+            params,
+            sorted(self.kwargs.items()),
+            request.user.pk if self.cache_per_user else None,
+            get_model_versions(models, self.cache_alias),
+        ] + list(extra)
+
+        return 'drf_multiple_model:{}:{}'.format(prefix, hashlib.md5(repr(key).encode('utf-8')).hexdigest())
+
+    def get_cache_key(self, request):
+        """
+        Builds the key for caching this request's response, which depends on all of
+        the querylist's models as well as on the renderer format
+        """
+        querylist = self.get_requested_querylist()
+
+        for query_data in querylist:
+            self.check_query_data(query_data)
+
+        models = self.get_cache_models(querylist)
+        labels = [self.get_item_label(query_data['queryset'], query_data) for query_data in querylist]
+
+        params = sorted(request.query_params.lists())
+
+        return self.make_cache_key('response', request, params, labels, models, request.accepted_renderer.format)
+
+    def list(self, request, *args, **kwargs):
+        """
+        Returns the cached response data, if response caching is enabled and it has been cached
+        """
+        # Streamed responses have no data to cache
+        if self.cache_timeout is None or self.streams_response(request):
+            return self.get_list_response(request, *args, **kwargs)
+
+        cache = caches[self.cache_alias]
+        cache_key = self.get_cache_key(request)
+
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = self.get_list_response(request, *args, **kwargs)
+        cache.set(cache_key, response.data, self.cache_timeout)
+
+        return response
+
+    def get_list_response(self, request, *args, **kwargs):
+        self.initialize_list(request)
+
+        querylist = self.get_requested_querylist()
+
+        if self.streams_response(request):
+            return self.get_streaming_response(querylist, request, *args, **kwargs)
+
+        evaluated = self.evaluate_querylist(querylist, request, *args, **kwargs)
+
+        return self.build_response(self.collect_results(evaluated), request)
+
+    def streams_response(self, request):
+        """
+        Responses are streamed if streaming is turned on, the response isn't paginated and
+        the accepted renderer can encode the data in chunks
+        """
+        return (
+            self.streaming and self.paginator is None and
+            hasattr(getattr(request, 'accepted_renderer', None), 'iter_list')
+        )
+
+    def get_streaming_response(self, querylist, request, *args, **kwargs):
+        for query_data in querylist:
+            self.check_query_data(query_data)
+
+        content = self.stream_content(querylist, request, *args, **kwargs)
 
-    def add_to_results(self, data, label, results):
+        return StreamingHttpResponse(content, content_type=request.accepted_renderer.media_type)
+
+    def stream_content(self, querylist, request, *args, **kwargs):
         """
-        responsible for updating the running `results` variable with the
-        data from this queryset/serializer combo
+        Generator yielding the encoded response body in chunks
         """
         raise NotImplementedError(
-            '{} must specify how to add data to the running results tally '
-            'by overriding the `add_to_results` method.'.format(
-                self.__class__.__name__
-            )
+            '{} must specify how to stream its results by overriding the '
+            '`stream_content` method.'.format(self.__class__.__name__)
         )
 
-    def format_results(self, results, request):
+    def iter_serialized_data(self, query_data, request, *args, **kwargs):
         """
-        hook for processing/formatting the entire returned data set, once
-        the querylist has been evaluated
+        Loads and serializes a querylist item one chunk at a time, without caching the whole
+        queryset, yielding the serialized data of each chunk
         """
-        return results
-
-    def list(self, request, *args, **kwargs):
-        querylist = self.get_querylist()
+        queryset = self.get_filtered_queryset(query_data, request, *args, **kwargs)
+        label = self.get_item_label(queryset, query_data)
 
-        results = self.get_empty_results()
-
-        for query_data in querylist:
-            self.check_query_data(query_data)
-
-            queryset = self.load_queryset(query_data, request, *args, **kwargs)
+        chunk_size = self.streaming_chunk_size
+        prefetch_lookups = []
+        if isinstance(queryset, QuerySet):
+            # `.iterator()` doesn't prefetch (before Django 4.1), so each chunk is prefetched instead
+            if 'values' not in query_data:
+                prefetch_lookups = queryset._prefetch_related_lookups
+                queryset = queryset.prefetch_related(None)
+            rows = queryset.iterator(chunk_size=chunk_size)
+        else:
+            rows = iter(queryset)
 
-            # Run the paired serializer
-            context = self.get_serializer_context()
-            data = query_data['serializer_class'](queryset, many=True, context=context).data
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
 
-            label = self.get_label(queryset, query_data)
+            if prefetch_lookups:
+                prefetch_related_objects(chunk, *prefetch_lookups)
 
-            # Add the serializer data to the running results tally
-            results = self.add_to_results(data, label, results)
+            yield self.get_serialized_data(chunk, query_data, label)
 
+    def build_response(self, results, request):
+        """
+        Formats the evaluated results, wrapping them in the pagination envelope if needed
+        """
         formatted_results = self.format_results(results, request)
 
+        # Labels paged on their own may be followed by unpaginated labels
+        if hasattr(self.paginator, 'has_paginated_labels'):
+            self.is_paginated = self.paginator.has_paginated_labels()
+
         if self.is_paginated:
             try:
                 formatted_results = self.paginator.format_response(formatted_results)
@@ -168,13 +992,34 @@ class FlatMultipleModelMixin(BaseMultipleModelMixin):
     sorting_fields_map = {}
     sorting_parameter_name = 'o'
 
+    # If True, the sorting fields are pushed into each queryset's `order_by` and the already sorted
+    # results are combined with a k-way merge, rather than re-sorting everything in python.
+    # Querylist items can include a `sorting_fields_map` of {result field name: model lookup} for
+    # models that name the sort column differently
+    sort_in_database = False
+
+    # The class that sorts (serialized) results in python. `NumpySortPlan` sorts large
+    # results faster, if NumPy is installed
+    sort_plan_class = SortPlan
+
+    # If set, the whole querylist is compiled into a single UNION ALL query projecting these
+    # columns (plus the pk and `type` label), with ordering and limit/offset applied in SQL.
+    # Only the rows on the page are then turned into model instances and serialized, so the
+    # serializers should only read these fields.  Querylist items can include a `union_fields_map`
+    # of {column name: model field} for models that name a column differently
+    union_fields = None
+
+    # If True, each querylist item first only loads the pk and sort values of its rows, which are
+    # sorted and paginated before the objects on the page are fetched (with `in_bulk`) and serialized,
+    # so the serialization costs depend on the page size rather than on the number of rows.  The sort
+    # values are read from the database, as with `sort_in_database`
+    two_phase_fetch = False
+
     # Flag to append the particular django model being used to the data
     add_model_type = True
 
     result_type = list
 
-    _list_attribute_error = 'Invalid sorting field. Corresponding data item is a list: {}'
-
     def initial(self, request, *args, **kwargs):
         """
         Overrides DRF's `initial` in order to set the `_sorting_field` from corresponding property in view.
@@ -190,8 +1035,337 @@ class FlatMultipleModelMixin(BaseMultipleModelMixin):
                 '``sorting_field`` property is pending its deprecation. Use ``sorting_fields`` instead.',
                 DeprecationWarning
             )
-            self.sorting_fields = [self.sorting_field]
-        self._sorting_fields = self.sorting_fields
+            self._sorting_fields = [self.sorting_field]
+        else:
+            self._sorting_fields = self.sorting_fields
+
+    def get_plan_sources(self):
+        cls = type(self)
+
+        return super(FlatMultipleModelMixin, self).get_plan_sources() + (
+            cls.sorting_field, cls.sorting_fields, cls.sorting_fields_map, cls.add_model_type
+        )
+
+    def has_static_sorting(self):
+        """
+        The sorting fields are static if they are set on the class, rather than with
+        properties or the view's initkwargs
+        """
+        cls = type(self)
+
+        return not any(
+            name in self.__dict__ or isinstance(getattr(cls, name, None), property)
+            for name in ('sorting_field', 'sorting_fields', 'sorting_fields_map')
+        )
+
+    def compile_querylist_plan(self):
+        """
+        Also parses static sorting fields, since only the sorting parameter depends on the request
+        """
+        plan = super(FlatMultipleModelMixin, self).compile_querylist_plan()
+
+        if self.has_static_sorting():
+            sorting_fields = self.sorting_fields or ([self.sorting_field] if self.sorting_field else [])
+            plan.sorting_fields = tuple(self.parse_sorting_fields(sorting_fields))
+
+        return plan
+
+    def initialize_list(self, request):
+        # Sorting fields are needed before the querysets are loaded when sorting in the database
+        self.prepare_sorting_fields()
+
+        # Paginators may need extra sorting fields, e.g. tie-breakers for cursors
+        if hasattr(self.paginator, 'get_sorting_fields'):
+            self._sorting_fields = self.paginator.get_sorting_fields(self._sorting_fields or [])
+
+        self._sort_plan = self.get_sort_plan()
+        self._result_streams = []
+
+    def get_sort_plan(self):
+        """
+        Compiles the sorting fields into a `sort_plan_class` plan, or returns None if the results
+        aren't sorted
+        """
+        return self.sort_plan_class(self._sorting_fields) if self._sorting_fields else None
+
+    def get_list_response(self, request, *args, **kwargs):
+        if self.union_fields:
+            self.initialize_list(request)
+            return self.union_list(request, *args, **kwargs)
+
+        if self.two_phase_fetch:
+            self.initialize_list(request)
+            return self.two_phase_list(request, *args, **kwargs)
+
+        return super(FlatMultipleModelMixin, self).get_list_response(request, *args, **kwargs)
+
+    def get_union_queryset(self, index, query_data, request, *args, **kwargs):
+        """
+        Projects a querylist item onto the shared `union_fields` columns, tagged with its
+        position in the querylist and its label
+        """
+        queryset = self.get_filtered_queryset(query_data, request, *args, **kwargs)
+        fields_map = query_data.get('union_fields_map', {})
+        label = self.get_item_label(queryset, query_data)
+
+        columns = [('union_{}'.format(field), models.F(fields_map.get(field, field))) for field in self.union_fields]
+        columns += [
+            ('union_pk', models.F('pk')),
+            ('union_index', models.Value(index, output_field=models.IntegerField())),
+            ('union_type', models.Value(label or '', output_field=models.CharField())),
+        ]
+
+        # Compound statements can't be ordered per query, and nothing is prefetched for the columns
+        return queryset.order_by().prefetch_related(None).values(**dict(columns))
+
+    def get_union_ordering(self):
+        """
+        Translates the sorting fields into an `order_by` list for the combined query, ending in
+        querylist order and pk so that ties are resolved as with `sort_results`
+        """
+        ordering = []
+        for field, descending in self._sorting_fields or []:
+            if field != 'type' and field not in self.union_fields:
+                raise ValidationError('Invalid sorting field: {}'.format(field))
+
+            ordering.append('{}union_{}'.format('-' if descending else '', field))
+
+        return ordering + ['union_index', 'union_pk']
+
+    def hydrate_union_rows(self, rows, querylist):
+        """
+        Builds model instances straight from the selected columns (without further queries)
+        and serializes them, keeping the order of the rows
+        """
+        positions = defaultdict(list)
+        for position, row in enumerate(rows):
+            positions[row['union_index']].append(position)
+
+        results = [None] * len(rows)
+        for index, row_positions in positions.items():
+            query_data = querylist[index]
+            model = query_data['queryset'].model
+            fields_map = query_data.get('union_fields_map', {})
+
+            attnames = {}
+            try:
+                for field in self.union_fields:
+                    attnames[model._meta.get_field(fields_map.get(field, field)).attname] = 'union_{}'.format(field)
+            except FieldDoesNotExist as error:
+                raise ValidationError('Invalid union field: {}'.format(error))
+            attnames[model._meta.pk.attname] = 'union_pk'
+
+            # `from_db` expects values in concrete field order; everything else is deferred
+            field_names = [f.attname for f in model._meta.concrete_fields if f.attname in attnames]
+            instances = [
+                model.from_db(None, field_names, [rows[position][attnames[name]] for name in field_names])
+                for position in row_positions
+            ]
+
+            label = self.get_item_label(query_data['queryset'], query_data)
+            data = self.get_serialized_data(instances, query_data, label)
+
+            for position, datum in zip(row_positions, data):
+                if label is not None:
+                    datum.update({'type': label})
+                results[position] = datum
+
+        return results
+
+    def union_list(self, request, *args, **kwargs):
+        """
+        Evaluates the whole querylist as a single UNION ALL query (plus one count query, when
+        paginated), and only serializes the rows on the requested page
+        """
+        querylist = self.get_requested_querylist()
+
+        querysets = []
+        for index, query_data in enumerate(querylist):
+            self.check_query_data(query_data)
+            if 'values' in query_data:
+                raise ValidationError('Querylist items with `values` cannot be used with `union_fields`')
+            querysets.append(self.get_union_queryset(index, query_data, request, *args, **kwargs))
+
+        if not querysets:
+            # No types were requested
+            return self.build_response([], request)
+
+        queryset = querysets[0].union(*querysets[1:], all=True).order_by(*self.get_union_ordering())
+
+        assert not hasattr(self.paginator, 'paginate_results'), (
+            '{} cannot be used with union_fields, since the union is paginated '
+            'in SQL'.format(self.paginator.__class__.__name__)
+        )
+        page = self.paginate_queryset(queryset)
+        self.is_paginated = page is not None
+
+        results = self.hydrate_union_rows(page if page is not None else list(queryset), querylist)
+
+        return self.build_response(results, request)
+
+    def get_sort_keys(self, index, query_data, request, *args, **kwargs):
+        """
+        Loads the pk and sort values of every row of a querylist item (the first phase of a
+        two-phase fetch), as dicts holding the sort values by position, tagged with the item's
+        position in the querylist.  Returns the filtered queryset along with the keys
+        """
+        queryset = self.get_filtered_queryset(query_data, request, *args, **kwargs)
+        label = self.get_item_label(queryset, query_data)
+
+        names, lookups = ['pk'], ['pk']
+        constants = {'index': index}
+        for position, (field, lookup, descending) in enumerate(self.get_sorting_lookups(query_data)):
+            if field != 'type':
+                names.append(str(position))
+                lookups.append(lookup)
+            elif label is not None:
+                # The label is the same for every row of the queryset
+                constants[str(position)] = label
+            else:
+                raise ValidationError('Invalid sorting field: type')
+
+        # Rows are read in pk order, so that ties are resolved as with `sort_in_database`
+        try:
+            rows = list(queryset.order_by('pk').prefetch_related(None).values_list(*lookups))
+        except FieldError as error:
+            raise ValidationError('Invalid sorting field: {}'.format(error))
+
+        keys = []
+        for row in rows:
+            key = dict(zip(names, row))
+            key.update(constants)
+            keys.append(key)
+
+        return queryset, keys
+
+    def sort_keys(self, keys, limit=None):
+        """
+        Sorts the keys of a two-phase fetch on their sort values, or selects the first `limit` of them
+        """
+        plan = self.sort_plan_class([
+            (str(position), descending) for position, (field, descending) in enumerate(self._sorting_fields)
+        ])
+
+        if limit is not None and limit < len(keys):
+            return plan.select(keys, limit)
+
+        return plan.sort(keys)
+
+    def hydrate_keys(self, keys, querylist, querysets):
+        """
+        Fetches the objects of the selected keys (the second phase of a two-phase fetch), with
+        one `in_bulk` query per querylist item, and serializes them in the order of the keys.
+        Rows that were deleted in between are left out
+        """
+        positions = defaultdict(list)
+        for position, key in enumerate(keys):
+            positions[key['index']].append(position)
+
+        results = [None] * len(keys)
+        for index, item_positions in positions.items():
+            query_data, queryset = querylist[index], querysets[index]
+            pks = [keys[position]['pk'] for position in item_positions]
+
+            if 'values' in query_data:
+                objects = dict((row[VALUES_PK], row) for row in queryset.filter(pk__in=pks))
+            else:
+                objects = queryset.in_bulk(pks)
+
+            found = [(position, pk) for position, pk in zip(item_positions, pks) if pk in objects]
+            label = self.get_item_label(queryset, query_data)
+            data = self.get_serialized_data([objects[pk] for position, pk in found], query_data, label)
+
+            for (position, pk), datum in zip(found, data):
+                if label is not None:
+                    datum.update({'type': label})
+                results[position] = datum
+
+        return [datum for datum in results if datum is not None]
+
+    def two_phase_list(self, request, *args, **kwargs):
+        """
+        Sorts and paginates the keys of every row first, and then only fetches and serializes the
+        objects on the requested page.  Every row's keys are loaded, so nothing needs counting
+        """
+        querylist = self.get_requested_querylist()
+
+        querysets, keys, counts = [], [], []
+        for index, query_data in enumerate(querylist):
+            self.check_query_data(query_data)
+            queryset, item_keys = self.get_sort_keys(index, query_data, request, *args, **kwargs)
+            querysets.append(queryset)
+            keys.extend(item_keys)
+            counts.append(len(item_keys))
+
+        self.is_paginated = False
+        if self.paginator is not None:
+            assert hasattr(self.paginator, 'paginate_counted'), (
+                '{} cannot be used with two_phase_fetch, since the page is cut out of the '
+                'sorted keys'.format(self.paginator.__class__.__name__)
+            )
+            self.is_paginated = self.paginator.paginate_counted(counts, request, view=self)
+
+        if self._sorting_fields:
+            keys = self.sort_keys(keys, self.get_results_limit())
+
+        if self.is_paginated:
+            keys = self.paginator.paginate_results(keys, [])
+
+        return self.build_response(self.hydrate_keys(keys, querylist, querysets), request)
+
+    def get_sorting_lookups(self, query_data):
+        """
+        Pairs each sorting field with the model lookup used for it by a single querylist
+        item, as a list of (field, lookup, descending) tuples
+        """
+        fields_map = query_data.get('sorting_fields_map', {})
+
+        return [
+            (field, fields_map.get(field, field), descending)
+            for field, descending in self._sorting_fields
+        ]
+
+    def get_ordering(self, query_data):
+        """
+        Translates the sorting fields into an `order_by` list for a single querylist item.
+        The `type` label is constant within a queryset, so it is left to the merge
+        """
+        ordering = [
+            '{}{}'.format('-' if descending else '', lookup)
+            for field, lookup, descending in self.get_sorting_lookups(query_data)
+            if field != 'type'
+        ]
+
+        # Ensure a deterministic order for rows with equal sort values
+        return ordering + ['pk']
+
+    def sorts_in_database(self):
+        """
+        Sorting happens in the database if the view asks for it, if responses are streamed,
+        or if the paginator relies on each queryset being sorted (e.g. to paginate the merged results)
+        """
+        return (
+            self.sort_in_database or self.streams_response(self.request) or
+            getattr(self.paginator, 'requires_database_sorting', False)
+        )
+
+    def prepare_queryset(self, queryset, query_data):
+        """
+        Orders the queryset by the sorting fields, if sorting is done in the database.
+        Cursor-based paginators also get to skip ahead to the current position here
+        """
+        if self._sorting_fields and self.sorts_in_database() and isinstance(queryset, QuerySet):
+            queryset = queryset.order_by(*self.get_ordering(query_data))
+
+            if hasattr(self.paginator, 'seek_queryset'):
+                queryset = self.paginator.seek_queryset(
+                    queryset,
+                    self.request,
+                    self.get_item_label(queryset, query_data),
+                    self.get_sorting_lookups(query_data),
+                )
+
+        return queryset
 
     def get_label(self, queryset, query_data):
         """
@@ -206,6 +1380,16 @@ class FlatMultipleModelMixin(BaseMultipleModelMixin):
             except AttributeError:
                 return query_data['queryset'].model.__name__
 
+    def encode_data(self, data, label):
+        """
+        Adds the label before pre-encoding the data, so that it is part of the encoded data
+        """
+        if label is not None:
+            for datum in data:
+                datum.update({'type': label})
+
+        return super(FlatMultipleModelMixin, self).encode_data(data, label)
+
     def add_to_results(self, data, label, results):
         """
         Adds the label to the results, as needed, then appends the data
@@ -217,15 +1401,28 @@ class FlatMultipleModelMixin(BaseMultipleModelMixin):
 
             results.append(datum)
 
+        # Keep track of each queryset's results separately, for merging
+        self._result_streams.append(data)
+
         return results
 
     def format_results(self, results, request):
         """
-        Prepares sorting parameters, and sorts results, if(as) necessary
+        Sorts results, if(as) necessary
         """
-        self.prepare_sorting_fields()
-        if self._sorting_fields:
-            results = self.sort_results(results)
+        # Union queries and two-phase fetches are sorted (and paginated) before serializing
+        presorted = self.union_fields or self.two_phase_fetch
+
+        if self._sorting_fields and not presorted:
+            limit = self.get_results_limit()
+            if self.sorts_in_database():
+                results = self.merge_results(self._result_streams, limit)
+            else:
+                results = self.sort_results(results, limit)
+
+        # Paginators that work on the merged results cut out the requested page here
+        if self.is_paginated and hasattr(self.paginator, 'paginate_results') and not presorted:
+            results = self.paginator.paginate_results(results, self._result_streams)
 
         if request.accepted_renderer.format == 'html':
             # Makes the the results available to the template context by transforming to a dict
@@ -233,28 +1430,22 @@ class FlatMultipleModelMixin(BaseMultipleModelMixin):
 
         return results
 
-    def _sort_by(self, datum, param, path=None):
+    def stream_content(self, querylist, request, *args, **kwargs):
         """
-        Key function that is used for results sorting. This is passed as argument to `sorted()`
+        Streams a single list.  Sorted results are merged as they are read from the (sorted)
+        querysets, so all of the querysets are iterated at the same time
         """
-        if not path:
-            path = []
-        try:
-            if '__' in param:
-                root, new_param = param.split('__')
-                path.append(root)
-                return self._sort_by(datum[root], param=new_param, path=path)
-            else:
-                path.append(param)
+        streams = [
+            itertools.chain.from_iterable(self.iter_serialized_data(query_data, request, *args, **kwargs))
+            for query_data in querylist
+        ]
 
-            data = datum[param]
-            if isinstance(data, list):
-                raise ValidationError(self._list_attribute_error.format(param))
-            return data
-        except TypeError:
-            raise ValidationError(self._list_attribute_error.format('.'.join(path)))
-        except KeyError:
-            raise ValidationError('Invalid sorting field: {}'.format('.'.join(path)))
+        if self._sorting_fields:
+            data = heapq.merge(*streams, key=self._sort_plan.key)
+        else:
+            data = itertools.chain.from_iterable(streams)
+
+        return request.accepted_renderer.iter_list(data, self.streaming_chunk_size)
 
     def prepare_sorting_fields(self):
         """
@@ -263,25 +1454,51 @@ class FlatMultipleModelMixin(BaseMultipleModelMixin):
         """
         if self.sorting_parameter_name in self.request.query_params:
             # Extract sorting parameter from query string
-            self._sorting_fields = [
+            self._sorting_fields = self.parse_sorting_fields([
                 _.strip() for _ in self.request.query_params.get(self.sorting_parameter_name).split(',')
-            ]
+            ])
+            return
 
-        if self._sorting_fields:
-            # Create a list of sorting parameters. Each parameter is a tuple: (field:str, descending:bool)
-            self._sorting_fields = [
-                (self.sorting_fields_map.get(field.lstrip('-'), field.lstrip('-')), field[0] == '-')
-                for field in self._sorting_fields
-            ]
+        plan = self.get_querylist_plan()
+        if plan is not None and plan.sorting_fields is not None and self.has_static_sorting():
+            self._sorting_fields = plan.sorting_fields
+        elif self._sorting_fields:
+            self._sorting_fields = self.parse_sorting_fields(self._sorting_fields)
 
-    def sort_results(self, results):
-        for field, descending in reversed(self._sorting_fields):
-            results = sorted(
-                results,
-                reverse=descending,
-                key=lambda x: self._sort_by(x, field)
-            )
-        return results
+    def parse_sorting_fields(self, sorting_fields):
+        """
+        Create a list of sorting parameters. Each parameter is a tuple: (field:str, descending:bool)
+        """
+        return [
+            (self.sorting_fields_map.get(field.lstrip('-'), field.lstrip('-')), field[0] == '-')
+            for field in sorting_fields
+        ]
+
+    def get_results_limit(self):
+        """
+        Returns how many of the sorted results are needed, if only the first few of them are
+        (i.e. for paginators that cut the page out of the merged results), or None
+        """
+        if self.is_paginated and hasattr(self.paginator, 'get_results_limit'):
+            return self.paginator.get_results_limit()
+
+    def sort_results(self, results, limit=None):
+        """
+        Sorts the results in python.  If only the first `limit` results are needed, those
+        are selected with a bounded heap instead
+        """
+        if limit is not None and limit < len(results):
+            return self._sort_plan.select(results, limit)
+
+        return self._sort_plan.sort(results)
+
+    def merge_results(self, streams, limit=None):
+        """
+        Combines the results of each queryset, already sorted by the database, with a k-way
+        merge, stopping after the first `limit` results if given. Ties are resolved in
+        querylist order, as with `sort_results`
+        """
+        return list(itertools.islice(heapq.merge(*streams, key=self._sort_plan.key), limit))
 
 
 class ObjectMultipleModelMixin(BaseMultipleModelMixin):
@@ -321,6 +1538,24 @@ class ObjectMultipleModelMixin(BaseMultipleModelMixin):
 
         return results
 
+    def stream_content(self, querylist, request, *args, **kwargs):
+        """
+        Streams a dict with a list for each label, evaluating one querylist item after another
+        """
+        renderer = request.accepted_renderer
+        item_separator, key_separator = [separator.encode() for separator in renderer.get_separators()]
+
+        yield b'{'
+        for index, query_data in enumerate(querylist):
+            label = self.get_item_label(query_data['queryset'], query_data)
+            yield (item_separator if index else b'') + renderer.dumps(str(label), renderer.get_separators())
+            yield key_separator
+
+            data = itertools.chain.from_iterable(self.iter_serialized_data(query_data, request, *args, **kwargs))
+            for chunk in renderer.iter_list(data, self.streaming_chunk_size):
+                yield chunk
+        yield b'}'
+
     def get_label(self, queryset, query_data):
         """
         Gets option label for each datum. Can be used for type identification
@@ -333,3 +1568,202 @@ class ObjectMultipleModelMixin(BaseMultipleModelMixin):
             return queryset.model.__name__
         except AttributeError:
             return query_data['queryset'].model.__name__
+
+
+class ExportMultipleModelMixin(object):
+    """
+    Adds an `export` action to a multiple model viewset, which streams every row of every
+    querylist item (filtered, but unpaginated) as NDJSON or CSV (`?format=ndjson|csv`), with
+    the label of each row in a `type` column.  Querysets are read with `.iterator()` (i.e.
+    with server-side cursors, where supported) and encoded `export_chunk_size` rows at a time
+    """
+    export_renderer_classes = (MultipleModelNDJSONRenderer, MultipleModelCSVRenderer)
+    export_chunk_size = 2000
+
+    # If True, exports are gzipped as they are streamed, for clients that accept it
+    export_gzip = False
+
+    def get_renderers(self):
+        if getattr(self, 'action', None) == 'export':
+            return [renderer() for renderer in self.export_renderer_classes]
+
+        return super(ExportMultipleModelMixin, self).get_renderers()
+
+    def get_export_columns(self, querylist):
+        """
+        The CSV columns: `type`, followed by the fields of every serializer (in querylist order)
+        """
+        columns = ['type']
+
+        for query_data in querylist:
+            label = self.get_item_label(query_data['queryset'], query_data)
+            sparse_fields = self.get_sparse_fields(label)
+
+            if 'values' in query_data:
+                fields = [field for field in query_data['values'] if sparse_fields is None or field in sparse_fields]
+            else:
+                fields = self.get_item_serializer(query_data, label).fields
+            columns.extend(field for field in fields if field not in columns)
+
+        return columns
+
+    def iter_export_rows(self, querylist, request, *args, **kwargs):
+        """
+        Generator yielding the serialized rows of each querylist item in turn, with their label
+        """
+        for query_data in querylist:
+            label = self.get_item_label(query_data['queryset'], query_data)
+
+            for data in self.iter_serialized_data(query_data, request, *args, **kwargs):
+                for datum in data:
+                    datum['type'] = label
+                    yield datum
+
+    def get_export_filename(self):
+        """
+        Exports are named after the viewset's router basename
+        """
+        return getattr(self, 'basename', None) or self.__class__.__name__.lower()
+
+    def gzip_content(self, content):
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+        for chunk in content:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+
+        yield compressor.flush()
+
+    @action(detail=False)
+    def export(self, request, *args, **kwargs):
+        self.initialize_list(request)
+
+        querylist = self.get_requested_querylist()
+        for query_data in querylist:
+            self.check_query_data(query_data)
+
+        renderer = request.accepted_renderer
+        content = renderer.iter_rows(
+            self.iter_export_rows(querylist, request, *args, **kwargs),
+            self.get_export_columns(querylist),
+            self.export_chunk_size,
+        )
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+
+        gzipped = self.export_gzip and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        response = StreamingHttpResponse(self.gzip_content(content) if gzipped else content, content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(
+            self.get_export_filename(), renderer.format
+        )
+
+        if self.export_gzip:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+
+        return response
+
+
+class AsyncMultipleModelMixin(object):
+    """
+    Turns a multiple model view or viewset into an async view (Django >= 3.1).  The querylist
+    items are evaluated concurrently with `asyncio.gather`, each in a worker thread with its
+    own database connection, so the event loop is never blocked by queries or serializers.
+    `max_workers` optionally limits how many items are evaluated at once
+    """
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        view = super(AsyncMultipleModelMixin, cls).as_view(*args, **initkwargs)
+
+        # Django only runs views natively as async if they are coroutine functions
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        return functools.wraps(view)(async_view)
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        Async version of rest_framework's `APIView.dispatch`
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication and permission checks may hit the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aevaluate_querylist(self, querylist, request, *args, **kwargs):
+        """
+        Evaluates every querylist item concurrently, returning a list of (data, label) pairs
+        in querylist order
+        """
+        item_views = self.get_item_views(querylist)
+        semaphore = asyncio.Semaphore(self.max_workers) if self.max_workers else None
+
+        async def evaluate(item_view, query_data):
+            evaluate_in_thread = sync_to_async(item_view._evaluate_in_thread, thread_sensitive=False)
+
+            if semaphore is None:
+                return await evaluate_in_thread(query_data, request, *args, **kwargs)
+
+            async with semaphore:
+                return await evaluate_in_thread(query_data, request, *args, **kwargs)
+
+        evaluated = await asyncio.gather(*[
+            evaluate(item_view, query_data) for item_view, query_data in zip(item_views, querylist)
+        ])
+
+        self.combine_item_views(item_views)
+
+        return list(evaluated)
+
+    async def alist(self, request, *args, **kwargs):
+        if getattr(self, 'union_fields', None) or getattr(self, 'two_phase_fetch', False):
+            # Unions and two-phase fetches are sorted and paginated as a whole anyway
+            return await sync_to_async(super(AsyncMultipleModelMixin, self).list)(request, *args, **kwargs)
+
+        if self.cache_timeout is None:
+            return await self.aget_list_response(request, *args, **kwargs)
+
+        cache = caches[self.cache_alias]
+        cache_key = await sync_to_async(self.get_cache_key)(request)
+
+        data = await sync_to_async(cache.get)(cache_key)
+        if data is not None:
+            return Response(data)
+
+        response = await self.aget_list_response(request, *args, **kwargs)
+        await sync_to_async(cache.set)(cache_key, response.data, self.cache_timeout)
+
+        return response
+
+    async def aget_list_response(self, request, *args, **kwargs):
+        self.initialize_list(request)
+
+        querylist = self.get_requested_querylist()
+        evaluated = await self.aevaluate_querylist(querylist, request, *args, **kwargs)
+
+        # Paginators may defer their count queries until the response is built
+        build_response = sync_to_async(self.build_response)
+        return await build_response(self.collect_results(evaluated), request)
@@ -0,0 +1,179 @@
+import functools
+import threading
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.relations import RelatedField
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+# How many serializer inspections are memoized (for the most recently used serializers)
+INSPECTION_CACHE_SIZE = 512
+
+_inspections = OrderedDict()
+_inspections_lock = threading.Lock()
+
+
+def inspect_serializer(inspect, key, get_serializer, model):
+    """
+    Returns `inspect(serializer, model)` (e.g. `get_related_lookups`), memoized on `key`, which
+    has to describe the serializer (e.g. its class and sparse fieldset).  The serializer is only
+    built by calling `get_serializer` when the inspection isn't memoized yet
+    """
+    key = (inspect, key, model)
+
+    with _inspections_lock:
+        if key in _inspections:
+            _inspections.move_to_end(key)
+            return _inspections[key]
+
+    result = inspect(get_serializer(), model)
+
+    with _inspections_lock:
+        _inspections[key] = result
+        while len(_inspections) > INSPECTION_CACHE_SIZE:
+            _inspections.popitem(last=False)
+
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def get_relations(model):
+    """
+    Returns the relations (forward relation fields, and reverse relations) of `model`, by
+    the name its instances access them as
+    """
+    relations = {}
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+
+        # Reverse relations are accessed by their accessor name (e.g. `play_set`)
+        accessor = field.get_accessor_name() if field.auto_created and not field.concrete else field.name
+        relations.setdefault(accessor, field)
+
+    return relations
+
+
+def get_relation(model, name):
+    """
+    Returns the relation (a forward relation field, or a reverse relation) that instances of
+    `model` access as `name`, or None if `name` isn't a relation
+    """
+    return get_relations(model).get(name)
+
+
+def get_related_lookups(serializer, model):
+    """
+    Works out the `select_related` and `prefetch_related` lookups needed for serializing
+    instances of `model` with `serializer` (following nested serializers, `source` paths
+    and related fields) without per-row queries.  Returns a (select_related, prefetch_related)
+    pair of lookup lists
+    """
+    select_related, prefetch_related = [], []
+    _add_related_lookups(serializer, model, [], False, select_related, prefetch_related)
+
+    # Lookups covered by a longer lookup are redundant
+    def prune(lookups):
+        return [
+            lookup for lookup in lookups
+            if not any(other.startswith(lookup + '__') for other in lookups)
+        ]
+
+    return prune(select_related), prune(prefetch_related)
+
+
+def _add_related_lookups(serializer, model, path, to_many, select_related, prefetch_related):
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        if field.source == '*':
+            # Nested serializers with `source='*'` read from the same instance
+            if isinstance(field, BaseSerializer):
+                _add_related_lookups(field, model, path, to_many, select_related, prefetch_related)
+            continue
+
+        field_model, field_path, field_to_many = model, list(path), to_many
+        attrs = field.source_attrs
+        for index, attr in enumerate(attrs):
+            relation = get_relation(field_model, attr)
+            if relation is None:
+                # Not a relation (e.g. a column or a property), so there's nothing to load
+                break
+
+            to_one = relation.many_to_one or relation.one_to_one
+            if index == len(attrs) - 1 and to_one and relation.concrete and isinstance(field, RelatedField):
+                # Related fields only read the foreign key column if they just need the pk
+                if field.use_pk_only_optimization():
+                    break
+
+            field_model = relation.related_model
+            field_path.append(attr)
+            field_to_many = field_to_many or not to_one
+        else:
+            if isinstance(field, BaseSerializer) and field_path != path:
+                _add_related_lookups(
+                    field, field_model, field_path, field_to_many, select_related, prefetch_related
+                )
+
+        if field_path != path:
+            lookup = '__'.join(field_path)
+            lookups = prefetch_related if field_to_many else select_related
+            if lookup not in lookups:
+                lookups.append(lookup)
+
+
+def get_loaded_fields(serializer, model):
+    """
+    Works out which fields of `model` have to be loaded for serializing its instances with
+    `serializer`, for use with `.only()`.  Related objects are loaded through their foreign key
+    field.  Returns None if that can't be told (e.g. if the serializer reads model properties
+    or has a `SerializerMethodField`)
+    """
+    fields = []
+    if not _add_loaded_fields(serializer, model, fields):
+        return None
+
+    return fields
+
+
+def _add_loaded_fields(serializer, model, fields):
+    if isinstance(serializer, ListSerializer):
+        serializer = serializer.child
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        if field.source == '*':
+            # Nested serializers with `source='*'` read from the same instance, anything else
+            # (like a `SerializerMethodField`) could read any field
+            if isinstance(field, BaseSerializer) and _add_loaded_fields(field, model, fields):
+                continue
+            return False
+
+        attr = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if get_relation(model, attr) is None:
+                return False
+
+            # Reverse relations don't need any columns of this model
+            continue
+
+        if model_field.many_to_many or model_field.auto_created and not model_field.concrete:
+            # Neither many-to-many nor reverse relations need any columns of this model
+            continue
+
+        if not model_field.concrete:
+            # e.g. a `GenericForeignKey`, which reads other fields
+            return False
+
+        if model_field.name not in fields:
+            fields.append(model_field.name)
+
+    return True
@@ -1,6 +1,22 @@
+import hashlib
+import json
+import operator
+from base64 import b64decode, b64encode
 from collections import OrderedDict
+from functools import reduce
 
-from rest_framework.pagination import LimitOffsetPagination
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, _positive_int
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from drf_multiple_model.mixins import FlatMultipleModelMixin, ObjectMultipleModelMixin
 
 
 class MultipleModelLimitOffsetPagination(LimitOffsetPagination):
@@ -10,31 +26,234 @@ class MultipleModelLimitOffsetPagination(LimitOffsetPagination):
     tally of the highest queryset `count`, rather than only referring
     to a single queryset's count
     """
+    # If True, all querysets are counted in a single query rather than one COUNT per queryset
+    combine_counts = False
+
+    # If set, counts are cached (in the `count_cache_alias` cache) for this many seconds,
+    # keyed by the query being counted
+    count_cache_timeout = None
+    count_cache_alias = 'default'
+
+    # Optional callable taking a queryset and returning an estimated count, or None to count
+    # it exactly (see `PostgresCountEstimator`)
+    count_estimator = None
+
+    # If False, no counts are made at all: each queryset fetches one extra row to find out
+    # whether there is a next page, and `highest_count`/`overall_total` are left out
+    include_counts = True
+
     def paginate_queryset(self, queryset, request, view=None):
         """
-        adds `max_count` as a running tally of the largest table size.  Used for calculating
-        next/previous links later
+        fetches the page for this queryset, and holds on to the queryset so that the counts
+        (used for `highest_count`, `overall_total` and the next/previous links) can all be
+        computed at once later
         """
-        result = super(MultipleModelLimitOffsetPagination, self).paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.request = request
 
         try:
-            if self.max_count < self.count:
-                self.max_count = self.count
+            self.querysets.append(queryset)
         except AttributeError:
-            self.max_count = self.count
+            self.querysets = [queryset]
+
+        return self.get_page(queryset)
+
+    def get_page(self, queryset):
+        if self.include_counts:
+            return list(queryset[self.offset:self.offset + self.limit])
+
+        # Fetch one extra row to find out whether there is a next page
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.page_has_next = len(page) > self.limit
+        self.has_next = getattr(self, 'has_next', False) or self.page_has_next
+
+        return page[:self.limit]
+
+    def get_item_state(self):
+        """
+        returns the state of the last paginated queryset, to be cached along with its page.
+        Its count is made right away, since the queryset isn't available to cached pages
+        """
+        if not self.include_counts:
+            return {'has_next': getattr(self, 'page_has_next', False)}
+
+        count = self.get_counts(self.querysets[-1:])[0]
+        self.querysets[-1] = count
+
+        return {'count': count}
 
+    def restore_item_state(self, state, request):
+        """
+        takes on the state of a cached page, as if its queryset had just been paginated
+        """
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.request = request
+
+        if 'count' in state:
+            # Counts are stored in place of the queryset
+            try:
+                self.querysets.append(state['count'])
+            except AttributeError:
+                self.querysets = [state['count']]
+        else:
+            self.has_next = getattr(self, 'has_next', False) or state['has_next']
+
+    def combine(self, paginator):
+        """
+        folds in the state of a paginator that was used for a single querylist item (i.e. when
+        the querylist is evaluated concurrently), as if it had paginated that queryset itself
+        """
+        querysets, has_next = getattr(self, 'querysets', []), getattr(self, 'has_next', False)
+
+        self.__dict__.update(paginator.__dict__)
+
+        self.querysets = querysets + getattr(paginator, 'querysets', [])
+        self.has_next = has_next or getattr(paginator, 'has_next', False)
+
+    def count_item_querysets(self):
+        """
+        counts the querysets paginated so far right away, in place, so that items evaluated
+        concurrently are counted in their worker thread.  Combined counts are left for
+        `format_response`, to still be made in a single query
+        """
+        if self.include_counts and not self.combine_counts and getattr(self, 'querysets', None):
+            self.querysets = self.get_counts(self.querysets)
+
+    def get_count_cache_key(self, queryset):
+        """
+        keys the count by the query being counted, or returns None for querysets that can't
+        match anything (e.g. `.none()`), which have no query
+        """
         try:
-            self.total += self.count
-        except AttributeError:
-            self.total = self.count
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return None
+
+        query = '{}:{}:{}'.format(queryset.db, sql, params)
+
+        return 'drf_multiple_model:count:{}'.format(hashlib.md5(query.encode('utf-8')).hexdigest())
+
+    def get_combined_counts(self, querysets):
+        """
+        counts several querysets (from the same database) with a single query.  Querysets that
+        can't match anything (e.g. `.none()`) are left out of it, and counted as 0
+        """
+        counts = [0] * len(querysets)
+        counted, selects, params = [], [], []
+        for index, queryset in enumerate(querysets):
+            queryset = queryset.order_by()
+            if not queryset.query.distinct:
+                queryset = queryset.values('pk')
+
+            try:
+                sql, queryset_params = queryset.query.sql_with_params()
+            except EmptyResultSet:
+                continue
+
+            counted.append(index)
+            selects.append('(SELECT COUNT(*) FROM ({}) count_{})'.format(sql, index))
+            params.extend(queryset_params)
+
+        if selects:
+            with connections[querysets[0].db].cursor() as cursor:
+                cursor.execute('SELECT {}'.format(', '.join(selects)), params)
+                for index, count in zip(counted, cursor.fetchone()):
+                    counts[index] = count
+
+        return counts
+
+    def get_counts(self, querysets):
+        """
+        counts every paginated queryset, using cached counts and estimates where possible
+        """
+        # Cached pages already come with their count
+        counts = [queryset if isinstance(queryset, int) else None for queryset in querysets]
+
+        cache_keys = {}
+        if self.count_cache_timeout is not None:
+            cache = caches[self.count_cache_alias]
+            for index, queryset in enumerate(querysets):
+                if isinstance(queryset, QuerySet):
+                    cache_key = self.get_count_cache_key(queryset)
+                    if cache_key is None:
+                        # Nothing to count (or cache)
+                        counts[index] = 0
+                    else:
+                        cache_keys[index] = cache_key
+
+            cached = cache.get_many(cache_keys.values())
+            for index, key in cache_keys.items():
+                counts[index] = cached.get(key)
 
-        return result
+            # Only counts that weren't already cached need to be stored
+            cache_keys = {index: key for index, key in cache_keys.items() if counts[index] is None}
+
+        if self.count_estimator is not None:
+            for index, queryset in enumerate(querysets):
+                if counts[index] is None and isinstance(queryset, QuerySet):
+                    counts[index] = self.count_estimator(queryset)
+
+        # Everything else is counted exactly, in a single query per database if combined
+        uncounted = [index for index, count in enumerate(counts) if count is None]
+        if self.combine_counts:
+            by_db = OrderedDict()
+            for index in uncounted:
+                queryset = querysets[index]
+                if isinstance(queryset, QuerySet) and not queryset.query.combinator:
+                    by_db.setdefault(queryset.db, []).append(index)
+
+            for indexes in by_db.values():
+                for index, count in zip(indexes, self.get_combined_counts([querysets[i] for i in indexes])):
+                    counts[index] = count
+
+        for index in uncounted:
+            if counts[index] is None:
+                counts[index] = self.get_count(querysets[index])
+
+        if cache_keys:
+            cache.set_many({key: counts[index] for index, key in cache_keys.items()}, self.count_cache_timeout)
+
+        return counts
+
+    def count_querysets(self):
+        """
+        sets `max_count` (the largest table size, used for calculating next/previous links)
+        and `total` from the counts of every paginated queryset
+        """
+        counts = self.get_counts(getattr(self, 'querysets', []))
+
+        self.max_count = max(counts) if counts else 0
+        self.total = sum(counts)
+
+        if self.max_count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+    def format_uncounted_response(self, data):
+        """
+        response without any counts, where the links only depend on whether there is a next page
+        """
+        self.count = self.offset + self.limit + (1 if getattr(self, 'has_next', False) else 0)
+
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ])
 
     def format_response(self, data):
         """
         replaces the `count` (the last queryset count) with the running `max_count` variable,
         to ensure accurate link calculation
         """
+        if not self.include_counts:
+            return self.format_uncounted_response(data)
+
+        self.count_querysets()
         self.count = self.max_count
 
         return OrderedDict([
@@ -44,3 +263,464 @@ class MultipleModelLimitOffsetPagination(LimitOffsetPagination):
             ('previous', self.get_previous_link()),
             ('results', data)
         ])
+
+
+class MultipleModelLabelLimitOffsetPagination(MultipleModelLimitOffsetPagination):
+    """
+    Limit/offset pagination for `ObjectMultipleModelMixin` views that pages every label on
+    its own, e.g. `?Play.limit=5&Poem.offset=20`.  Labels without their own parameters fall
+    back to the regular `limit`/`offset` parameters.  The response has a count and
+    next/previous links for each label, and labels with a limit of 0 are neither fetched
+    nor counted
+    """
+    label_query_param_format = '{label}.{param}'
+
+    def get_label_query_param(self, label, param):
+        return self.label_query_param_format.format(label=label, param=param)
+
+    def get_label_query_params(self, label):
+        """
+        the names of the query parameters that only apply to the given label
+        """
+        return [
+            self.get_label_query_param(label, param) for param in (self.limit_query_param, self.offset_query_param)
+        ]
+
+    def get_label_limit(self, request, label):
+        try:
+            return _positive_int(
+                request.query_params[self.get_label_query_param(label, self.limit_query_param)],
+                cutoff=self.max_limit
+            )
+        except (KeyError, ValueError):
+            return self.get_limit(request)
+
+    def get_label_offset(self, request, label):
+        try:
+            return _positive_int(request.query_params[self.get_label_query_param(label, self.offset_query_param)])
+        except (KeyError, ValueError):
+            return self.get_offset(request)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        raise NotImplementedError(
+            '{} can only paginate the querysets of an ObjectMultipleModelMixin view'.format(self.__class__.__name__)
+        )
+
+    def add_window(self, label, window):
+        try:
+            self.windows[label] = window
+        except AttributeError:
+            self.windows = OrderedDict([(label, window)])
+
+    def paginate_labeled_queryset(self, queryset, label, request, view=None):
+        """
+        fetches the page for this label's queryset, and holds on to the queryset so that
+        the counts can all be computed at once later
+        """
+        assert view is None or isinstance(view, ObjectMultipleModelMixin), (
+            '{} can only be used with an ObjectMultipleModelMixin view'.format(self.__class__.__name__)
+        )
+
+        self.limit = self.get_label_limit(request, label)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_label_offset(request, label)
+        self.request = request
+        self.label = label
+
+        window = {'limit': self.limit, 'offset': self.offset, 'queryset': queryset}
+        self.add_window(label, window)
+
+        if not self.limit:
+            # Nothing to fetch
+            return []
+
+        page = self.get_page(queryset)
+        if not self.include_counts:
+            window['has_next'] = self.page_has_next
+
+        return page
+
+    def has_paginated_labels(self):
+        """
+        whether any label was paginated, in which case the whole response is
+        """
+        return bool(getattr(self, 'windows', None))
+
+    def get_item_state(self):
+        """
+        returns the window of the last paginated label, with its count
+        """
+        window = dict(self.windows[self.label], label=self.label)
+
+        queryset = window.pop('queryset')
+        if self.include_counts and window['limit']:
+            window['count'] = self.windows[self.label]['queryset'] = self.get_counts([queryset])[0]
+
+        return window
+
+    def restore_item_state(self, state, request):
+        """
+        takes on the window of a cached page, as if its queryset had just been paginated
+        """
+        self.request = request
+
+        window = dict(state)
+        self.label = window.pop('label')
+
+        # Counts are stored in place of the queryset
+        window['queryset'] = window.pop('count', None)
+        self.add_window(self.label, window)
+
+    def combine(self, paginator):
+        """
+        folds in the windows of a paginator that was used for a single querylist item
+        """
+        windows = getattr(self, 'windows', OrderedDict())
+
+        self.__dict__.update(paginator.__dict__)
+
+        windows.update(getattr(paginator, 'windows', {}))
+        self.windows = windows
+
+    def count_item_querysets(self):
+        """
+        counts the querysets of the windows paginated so far right away, in place
+        """
+        if not self.include_counts or self.combine_counts:
+            return
+
+        windows = [window for window in getattr(self, 'windows', {}).values() if window['limit']]
+        for window, count in zip(windows, self.get_counts([window['queryset'] for window in windows])):
+            window['queryset'] = count
+
+    def get_label_links(self, label, window, has_next):
+        """
+        returns the next and previous links for a single label
+        """
+        url = self.request.build_absolute_uri()
+        limit, offset = window['limit'], window['offset']
+
+        url = replace_query_param(url, self.get_label_query_param(label, self.limit_query_param), limit)
+        offset_query_param = self.get_label_query_param(label, self.offset_query_param)
+
+        next_link = replace_query_param(url, offset_query_param, offset + limit) if has_next else None
+
+        if offset <= 0:
+            previous_link = None
+        elif offset - limit <= 0:
+            previous_link = remove_query_param(url, offset_query_param)
+        else:
+            previous_link = replace_query_param(url, offset_query_param, offset - limit)
+
+        return next_link, previous_link
+
+    def format_response(self, data):
+        """
+        adds the count (unless counts are turned off) and links of every label that was fetched
+        """
+        windows = [(label, window) for label, window in getattr(self, 'windows', {}).items() if window['limit']]
+
+        if self.include_counts:
+            counts = self.get_counts([window['queryset'] for label, window in windows])
+        else:
+            counts = [None] * len(windows)
+
+        label_counts, next_links, previous_links = OrderedDict(), OrderedDict(), OrderedDict()
+        for (label, window), count in zip(windows, counts):
+            if count is None:
+                has_next = window.get('has_next', False)
+            else:
+                label_counts[label] = count
+                has_next = window['offset'] + window['limit'] < count
+
+            next_links[label], previous_links[label] = self.get_label_links(label, window, has_next)
+
+        response = OrderedDict()
+        if self.include_counts:
+            response['counts'] = label_counts
+
+        response['next'] = next_links
+        response['previous'] = previous_links
+        response['results'] = data
+
+        return response
+
+
+class PostgresCountEstimator(object):
+    """
+    Estimates counts from the PostgreSQL query planner (`EXPLAIN`) instead of running a COUNT.
+    Querysets estimated below `threshold` rows, or on other databases, are counted exactly
+    """
+    def __init__(self, threshold=100000):
+        self.threshold = threshold
+
+    def __call__(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            # The queryset can't match anything
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) {}'.format(sql), params)
+            plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        estimate = plan[0]['Plan']['Plan Rows']
+
+        return estimate if estimate >= self.threshold else None
+
+
+class FlatMultipleModelLimitOffsetPagination(MultipleModelLimitOffsetPagination):
+    """
+    Limit/offset pagination over the merged (and sorted) results of a `FlatMultipleModelMixin`,
+    rather than over each queryset separately.  Each queryset is sorted by the database
+    and fetches at most `offset + limit` rows, after which the requested page is cut
+    out of the merged results
+    """
+    # Slicing each queryset is only correct if it is already in the final sort order.  If
+    # False (e.g. to sort on serialized fields the database can't sort on), every row is
+    # fetched and only the first `offset + limit` results are picked out in python
+    requires_database_sorting = True
+
+    def paginate_queryset(self, queryset, request, view=None):
+        assert view is None or isinstance(view, FlatMultipleModelMixin), (
+            '{} can only be used with a FlatMultipleModelMixin view'.format(self.__class__.__name__)
+        )
+
+        return super(FlatMultipleModelLimitOffsetPagination, self).paginate_queryset(queryset, request, view)
+
+    def get_page(self, queryset):
+        """
+        fetches every row that could possibly end up in the requested page (plus one, to
+        find out whether there is a next page, when not counting)
+        """
+        if not self.requires_database_sorting:
+            # Unsorted querysets can't be sliced, but once fetched they don't need counting
+            page = list(queryset)
+            self.querysets[-1] = len(page)
+            return page
+
+        return list(queryset[:self.offset + self.limit + (0 if self.include_counts else 1)])
+
+    def paginate_counted(self, counts, request, view=None):
+        """
+        sets up the pagination of querysets whose rows were already loaded and counted (by a
+        two-phase fetch), returning whether the results are paginated.  The page is then cut
+        out of the sorted keys with `paginate_results`
+        """
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return False
+
+        self.offset = self.get_offset(request)
+        self.request = request
+
+        # The counts stand in for the querysets, so nothing is counted again
+        self.querysets = list(counts)
+
+        return True
+
+    def get_results_limit(self):
+        # One more than needed for the page, to find out whether there is a next page
+        return self.offset + self.limit + 1
+
+    def paginate_results(self, results, streams):
+        """
+        cuts the requested page out of the merged results
+        """
+        self.has_next = len(results) > self.offset + self.limit
+
+        return results[self.offset:self.offset + self.limit]
+
+    def format_response(self, data):
+        """
+        uses the `total` across all querysets for link calculation, since the
+        limit/offset pair applies to the merged results
+        """
+        if not self.include_counts:
+            return self.format_uncounted_response(data)
+
+        self.count_querysets()
+        self.count = self.total
+
+        return OrderedDict([
+            ('overall_total', self.total),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ])
+
+
+class MultipleModelCursorPagination(BasePagination):
+    """
+    Keyset pagination over the merged results of a `FlatMultipleModelMixin`.  The cursor
+    holds the sort values, `type` label and pk of the last item on the page, and each
+    queryset is filtered to the rows that come after it, so every page costs the same
+    no matter how deep it is.  Only forward (`next`) links are provided
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = None
+    max_page_size = None
+    invalid_cursor_message = _('Invalid cursor')
+
+    # Querysets must be in the final sort order for seeking and slicing to work
+    requires_database_sorting = True
+
+    def combine(self, paginator):
+        """
+        takes on the state of a paginator that was used for a single querylist item (i.e. when
+        the querylist is evaluated concurrently)
+        """
+        self.__dict__.update(paginator.__dict__)
+
+    def get_sorting_fields(self, sorting_fields):
+        """
+        adds the `type` label as a tie-breaker after the view's sorting fields (the pk
+        is always the final tie-breaker within a queryset)
+        """
+        if 'type' in [field for field, descending in sorting_fields]:
+            return sorting_fields
+
+        return list(sorting_fields) + [('type', False)]
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def decode_cursor(self, request):
+        """
+        returns the decoded cursor as a dict, or None if no cursor was given
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            cursor = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            assert isinstance(cursor['values'], list) and 'pk' in cursor
+        except (TypeError, ValueError, KeyError, AssertionError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return cursor
+
+    def encode_cursor(self, cursor):
+        encoded = b64encode(json.dumps(cursor).encode('utf-8')).decode('ascii')
+
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def seek_queryset(self, queryset, request, label, lookups):
+        """
+        filters the (already ordered) queryset down to the rows that sort after the cursor.
+        `lookups` is a list of (field, lookup, descending) tuples for this queryset
+        """
+        try:
+            cursor = self._cursor
+        except AttributeError:
+            cursor = self._cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            return queryset
+
+        if len(cursor['values']) != len(lookups):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Rows sort after the cursor if, for any sort field, all of the previous fields are
+        # equal to the cursor's values and this one comes after it
+        conditions = []
+        equal = Q()
+        for (field, lookup, descending), value in zip(lookups, cursor['values']):
+            if field == 'type':
+                # The label is the same for the whole queryset, so compare it directly
+                if (label < value) if descending else (label > value):
+                    conditions.append(equal)
+                if label != value:
+                    break
+            else:
+                after = '{}__{}'.format(lookup, 'lt' if descending else 'gt')
+                conditions.append(equal & Q(**{after: value}))
+                equal &= Q(**{lookup: value})
+        else:
+            conditions.append(equal & Q(pk__gt=cursor['pk']))
+
+        if not conditions:
+            return queryset.none()
+
+        return queryset.filter(reduce(operator.or_, conditions))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        assert view is None or isinstance(view, FlatMultipleModelMixin), (
+            '{} can only be used with a FlatMultipleModelMixin view'.format(self.__class__.__name__)
+        )
+
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.view = view
+
+        # Fetch one extra row to find out whether there is a next page
+        return list(queryset[:self.page_size + 1])
+
+    def get_results_limit(self):
+        # One more than the page size, to find out whether there is a next page
+        return self.page_size + 1
+
+    def paginate_results(self, results, streams):
+        """
+        cuts the page out of the merged results and builds the cursor for the next page
+        from the last item on it
+        """
+        page = results[:self.page_size]
+        self.next_cursor = None
+
+        if len(results) > self.page_size:
+            last = page[-1]
+            self.next_cursor = {
+                'values': self.view._sort_plan.get_values(last),
+                'pk': self.get_pk(last, streams),
+            }
+
+        return page
+
+    def get_pk(self, datum, streams):
+        """
+        finds the pk of the object a serialized datum was created from
+        """
+        for stream in streams:
+            for index, item in enumerate(stream):
+                if item is datum:
+                    # `values` querylist items hold on to their pks
+                    pks = getattr(stream, 'pks', None)
+                    return pks[index] if pks is not None else stream.serializer.instance[index].pk
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+
+        return self.encode_cursor(self.next_cursor)
+
+    def format_response(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ])
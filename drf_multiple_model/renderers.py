@@ -0,0 +1,207 @@
+import csv
+import io
+import json
+
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class EncodedDict(dict):
+    """
+    A serialized datum that also holds on to its pre-encoded JSON, so that it only needs to be
+    encoded once.  It is still a regular dict, for sorting and for any other renderer
+    """
+    def __init__(self, data, encoded):
+        super(EncodedDict, self).__init__(data)
+        self.encoded = encoded
+
+
+class MultipleModelJSONRenderer(JSONRenderer):
+    """
+    A JSON renderer that splices the pre-encoded JSON of each datum into the response, rather
+    than encoding the whole response at once.  Multiple model views pre-encode their data (once
+    per object, with object caching) when this is the accepted renderer
+    """
+    def get_separators(self):
+        return SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+
+    def dumps(self, data, separators):
+        ret = json.dumps(
+            data, cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=separators
+        )
+
+        # Same escaping as rest_framework's JSONRenderer
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
+
+    def encode_datum(self, datum):
+        """
+        pre-encodes a single serialized datum
+        """
+        return EncodedDict(datum, self.dumps(datum, self.get_separators()))
+
+    def encode_key(self, key, separators):
+        """
+        encodes a dict key, converting non-string keys (e.g. `None` to "null") as `json.dumps` does
+        """
+        if not isinstance(key, str):
+            key, = json.loads(json.dumps({key: None}, allow_nan=not self.strict))
+
+        return self.dumps(key, separators)
+
+    def encode(self, data, separators):
+        """
+        encodes the response, splicing in pre-encoded data.  Dicts (i.e. the pagination envelope
+        and the labels of object views) are encoded key by key, and lists item by item
+        """
+        item_separator, key_separator = [separator.encode() for separator in separators]
+
+        if isinstance(data, EncodedDict):
+            return data.encoded
+
+        if isinstance(data, dict):
+            return b'{' + item_separator.join(
+                self.encode_key(key, separators) + key_separator + self.encode(value, separators)
+                for key, value in data.items()
+            ) + b'}'
+
+        if isinstance(data, (list, tuple)):
+            return b'[' + item_separator.join(
+                item.encoded if isinstance(item, EncodedDict) else self.dumps(item, separators)
+                for item in data
+            ) + b']'
+
+        return self.dumps(data, separators)
+
+    def iter_list(self, data, chunk_size=1000):
+        """
+        encodes an iterable of data as a JSON list, yielding the encoded list in chunks of
+        (at most) `chunk_size` items
+        """
+        separators = self.get_separators()
+        item_separator = separators[0].encode()
+
+        chunk = []
+        prefix = b'['
+        for datum in data:
+            chunk.append(self.encode(datum, separators))
+            if len(chunk) >= chunk_size:
+                yield prefix + item_separator.join(chunk)
+                chunk, prefix = [], item_separator
+
+        if chunk:
+            yield prefix + item_separator.join(chunk) + b']'
+        else:
+            yield b'[]' if prefix == b'[' else b']'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            # Pre-encoded data is never indented
+            return super(MultipleModelJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+
+        return self.encode(data, self.get_separators())
+
+
+class MultipleModelNDJSONRenderer(JSONRenderer):
+    """
+    Renders newline delimited JSON (one object per line), for exports
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def dumps(self, data):
+        ret = json.dumps(
+            data, cls=self.encoder_class,
+            ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=SHORT_SEPARATORS
+        )
+
+        # Unescaped, these are line separators to some readers
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
+
+    def iter_rows(self, rows, columns, chunk_size=1000):
+        """
+        encodes an iterable of rows, yielding (at most) `chunk_size` lines at a time.
+        Every row is written as is, so `columns` aren't needed
+        """
+        chunk = []
+        for row in rows:
+            chunk.append(self.dumps(row) + b'\n')
+            if len(chunk) >= chunk_size:
+                yield b''.join(chunk)
+                chunk = []
+
+        if chunk:
+            yield b''.join(chunk)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # Anything other than a list (e.g. an error) is a single line
+        return b''.join(self.iter_rows(data if isinstance(data, list) else [data], None))
+
+
+class MultipleModelCSVRenderer(BaseRenderer):
+    """
+    Renders CSV, for exports.  Nested data is written as JSON
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def get_value(self, value):
+        if value is None:
+            return ''
+
+        if isinstance(value, (dict, list)):
+            return json.dumps(value)
+
+        return value
+
+    def iter_rows(self, rows, columns, chunk_size=1000):
+        """
+        encodes an iterable of rows as CSV with the given `columns` (missing values are
+        left empty), yielding the header and then (at most) `chunk_size` rows at a time
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            chunk = buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writerow(columns)
+        yield flush()
+
+        count = 0
+        for row in rows:
+            writer.writerow([self.get_value(row.get(column)) for column in columns])
+            count += 1
+            if count % chunk_size == 0:
+                yield flush()
+
+        if count % chunk_size:
+            yield flush()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # Anything other than a list (e.g. an error) is a single row
+        rows = data if isinstance(data, list) else [data]
+
+        columns = []
+        for row in rows:
+            columns.extend(column for column in row if column not in columns)
+
+        return b''.join(self.iter_rows(rows, columns))
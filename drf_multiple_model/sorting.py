@@ -0,0 +1,210 @@
+import heapq
+import operator
+
+from django.core.exceptions import ValidationError
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class _Descending(object):
+    """
+    Wraps a sort key value so that it compares in reverse. Allows a single composite key
+    to mix ascending and descending fields
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def compile_getter(path):
+    """
+    Returns a function that looks up a (`__` separated, already split) path in a datum
+    """
+    getters = [operator.itemgetter(name) for name in path]
+    if len(getters) == 1:
+        return getters[0]
+
+    def getter(datum):
+        for get in getters:
+            datum = get(datum)
+        return datum
+
+    return getter
+
+
+class SortPlan(object):
+    """
+    The sorting fields of a flat view, compiled once per request.  Each field's lookup
+    path (of any depth) is parsed into a getter up front, rather than for every datum.
+    `sorting_fields` is a list of (field, descending) tuples
+    """
+    list_attribute_error = 'Invalid sorting field. Corresponding data item is a list: {}'
+
+    def __init__(self, sorting_fields):
+        self.fields = list(sorting_fields)
+        self.paths = [field.split('__') for field, descending in self.fields]
+        self.getters = [compile_getter(path) for path in self.paths]
+        self.descending = [descending for field, descending in self.fields]
+
+    def get_value(self, datum, index):
+        """
+        Looks up the value of the `index`th sorting field in a datum, raising a
+        `ValidationError` if it is missing or a list
+        """
+        path = self.paths[index]
+        for depth, name in enumerate(path):
+            try:
+                datum = datum[name]
+            except TypeError:
+                raise ValidationError(self.list_attribute_error.format('.'.join(path[:depth + 1])))
+            except KeyError:
+                raise ValidationError('Invalid sorting field: {}'.format('.'.join(path[:depth + 1])))
+
+        if isinstance(datum, list):
+            raise ValidationError(self.list_attribute_error.format(path[-1]))
+
+        return datum
+
+    def get_values(self, datum):
+        return [self.get_value(datum, index) for index in range(len(self.fields))]
+
+    def key(self, datum):
+        """
+        Composite key function covering all sorting fields at once, used for merging
+        """
+        return tuple(
+            _Descending(value) if descending else value
+            for value, descending in zip(self.get_values(datum), self.descending)
+        )
+
+    def get_column(self, results, index):
+        """
+        Looks up the values of the `index`th sorting field for every datum at once.  Invalid
+        data is only looked into (with `get_value`) when something goes wrong
+        """
+        try:
+            column = list(map(self.getters[index], results))
+        except (KeyError, TypeError):
+            column = None
+
+        if column is None or any(issubclass(value_type, list) for value_type in set(map(type, column))):
+            column = [self.get_value(datum, index) for datum in results]
+
+        return column
+
+    def get_descending_column(self, column):
+        # Numbers can simply be negated, anything else compares in reverse when wrapped
+        if set(map(type, column)) <= {int, float}:
+            return [-value for value in column]
+
+        return list(map(_Descending, column))
+
+    def select(self, results, count):
+        """
+        Returns the first `count` results in sorted order (exactly `sort(results)[:count]`),
+        selected with a bounded heap rather than sorting all of the results
+        """
+        if count >= len(results):
+            return self.sort(results)
+
+        columns = [self.get_column(results, index) for index in range(len(self.fields))]
+
+        # If every field is descending, the largest keys can be selected instead
+        reverse = all(self.descending)
+        if not reverse:
+            columns = [
+                self.get_descending_column(column) if descending else column
+                for column, descending in zip(columns, self.descending)
+            ]
+
+        keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+        select = heapq.nlargest if reverse else heapq.nsmallest
+
+        return [results[index] for index in select(count, range(len(results)), key=keys.__getitem__)]
+
+    def sort(self, results):
+        """
+        Sorts the results (stably) on every field.  The sort values are looked up (and
+        validated) once per field, after which the results are put in order
+        """
+        columns = [self.get_column(results, index) for index in range(len(self.fields))]
+
+        return [results[index] for index in self.get_order(results, columns)]
+
+    def get_order(self, results, columns):
+        """
+        Returns the sorted order of the results (as indexes) from their sort values.  An index
+        permutation is sorted on each field in turn, comparing the plain values, which is
+        cheaper than comparing composite keys
+        """
+        order = list(range(len(results)))
+        for column, descending in reversed(list(zip(columns, self.descending))):
+            order.sort(key=column.__getitem__, reverse=descending)
+
+        return order
+
+
+class NumpySortPlan(SortPlan):
+    """
+    A `SortPlan` that orders the results with NumPy: each field's sort values are turned
+    into an array once, and the results are ordered with a single (stable) `lexsort`.
+    Only numbers are sorted this way; results with other sort values (e.g. strings, which
+    would take up the length of the longest string for every value in a NumPy array), or
+    any results if NumPy isn't installed, are sorted in python instead.  Selecting the
+    first few results is left to the (cheaper) bounded heap of `SortPlan`, so it only helps
+    with fully sorting numeric keys
+    """
+    def get_array(self, column, descending):
+        """
+        Returns the sort values as an array that sorts ascending, or None if they can't be
+        sorted with NumPy
+        """
+        value_types = set(map(type, column))
+        if not value_types <= {int, float, bool}:
+            return None
+
+        try:
+            array = numpy.array(column)
+        except OverflowError:
+            return None
+
+        if array.dtype.kind not in 'iuf' or (float in value_types and int in value_types):
+            # Large ints don't fit, and mixed ints and floats would lose precision
+            return None
+
+        return -array if descending else array
+
+    def get_arrays(self, columns):
+        """
+        Returns an array of sort values for every field, or None if the results can't be
+        sorted with NumPy
+        """
+        if numpy is None:
+            return None
+
+        arrays = []
+        for column, descending in zip(columns, self.descending):
+            array = self.get_array(column, descending)
+            if array is None:
+                return None
+            arrays.append(array)
+
+        return arrays
+
+    def get_order(self, results, columns):
+        arrays = self.get_arrays(columns) if results else None
+        if arrays is None:
+            return super(NumpySortPlan, self).get_order(results, columns)
+
+        # `lexsort` sorts on its last key first
+        return numpy.lexsort(arrays[::-1]).tolist()
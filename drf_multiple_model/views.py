@@ -1,4 +1,4 @@
-from drf_multiple_model.mixins import FlatMultipleModelMixin, ObjectMultipleModelMixin
+from drf_multiple_model.mixins import AsyncMultipleModelMixin, FlatMultipleModelMixin, ObjectMultipleModelMixin
 
 from rest_framework.generics import GenericAPIView
 
@@ -17,3 +17,13 @@ class ObjectMultipleModelAPIView(ObjectMultipleModelMixin, GenericAPIView):
 
     def get_queryset(self):
         return None
+
+
+class AsyncFlatMultipleModelAPIView(AsyncMultipleModelMixin, FlatMultipleModelAPIView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncObjectMultipleModelAPIView(AsyncMultipleModelMixin, ObjectMultipleModelAPIView):
+    async def get(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
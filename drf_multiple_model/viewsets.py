@@ -1,6 +1,6 @@
 from rest_framework.viewsets import GenericViewSet
 
-from drf_multiple_model.mixins import FlatMultipleModelMixin, ObjectMultipleModelMixin
+from drf_multiple_model.mixins import AsyncMultipleModelMixin, FlatMultipleModelMixin, ObjectMultipleModelMixin
 
 
 class FlatMultipleModelAPIViewSet(FlatMultipleModelMixin, GenericViewSet):
@@ -11,3 +11,13 @@ class FlatMultipleModelAPIViewSet(FlatMultipleModelMixin, GenericViewSet):
 class ObjectMultipleModelAPIViewSet(ObjectMultipleModelMixin, GenericViewSet):
     def get_queryset(self):
         return None
+
+
+class AsyncFlatMultipleModelAPIViewSet(AsyncMultipleModelMixin, FlatMultipleModelAPIViewSet):
+    async def list(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+
+class AsyncObjectMultipleModelAPIViewSet(AsyncMultipleModelMixin, ObjectMultipleModelAPIViewSet):
+    async def list(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
@@ -44,3 +44,17 @@ class AuthorListSerializer(AuthorSerializer):
     class Meta:
         model = Author
         fields = AuthorSerializer.Meta.fields + ('plays', 'poems')
+
+
+class PlayTitleAsNameSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='title')
+
+    class Meta:
+        model = Play
+        fields = ('name', 'year')
+
+
+class PlayTitleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Play
+        fields = ('title',)
@@ -0,0 +1,132 @@
+from unittest import skipIf
+
+import django
+from django.test import override_settings
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import routers, status
+
+from .utils import MultipleModelTransactionTestCase
+from .models import Play, Poem
+from .serializers import PlaySerializer, PoemSerializer
+from drf_multiple_model.views import AsyncFlatMultipleModelAPIView, AsyncObjectMultipleModelAPIView
+from drf_multiple_model.viewsets import AsyncFlatMultipleModelAPIViewSet
+from drf_multiple_model.pagination import FlatMultipleModelLimitOffsetPagination, MultipleModelLimitOffsetPagination
+
+try:
+    from asgiref.sync import async_to_sync
+except ImportError:
+    async_to_sync = None
+
+
+factory = APIRequestFactory()
+
+
+async def title_without_letter(queryset, request, *args, **kwargs):
+    letter_to_exclude = request.query_params['letter']
+    return queryset.exclude(title__icontains=letter_to_exclude)
+
+
+class AsyncFlatView(AsyncFlatMultipleModelAPIView):
+    sorting_fields = ['title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer, 'filter_fn': title_without_letter},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+class LimitPagination(MultipleModelLimitOffsetPagination):
+    default_limit = 2
+
+
+class AsyncObjectView(AsyncObjectMultipleModelAPIView):
+    max_workers = 1
+    pagination_class = LimitPagination
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
+class FlatLimitPagination(FlatMultipleModelLimitOffsetPagination):
+    default_limit = 2
+
+
+class AsyncTwoPhaseFlatView(AsyncFlatMultipleModelAPIView):
+    two_phase_fetch = True
+    sorting_fields = ['-title']
+    pagination_class = FlatLimitPagination
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
+class AsyncFlatViewSet(AsyncFlatMultipleModelAPIViewSet):
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+router = routers.SimpleRouter()
+router.register(r'flat', AsyncFlatViewSet, basename='flat')
+
+urlpatterns = router.urls
+
+
+@skipIf(django.VERSION < (3, 1), 'Async views require Django 3.1 or later')
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(MultipleModelTransactionTestCase):
+    def test_async_flat_view(self):
+        """
+        Async views should give the same results as the regular views, including async filter functions
+        """
+        view = AsyncFlatView.as_view()
+
+        response = async_to_sync(view)(factory.get('/', {'letter': 'o'})).render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'genre': 'Comedy', 'title': 'A Midsummer Night\'s Dream', 'year': 1600, 'type': 'Play'},
+            {'title': "As a decrepit father takes delight", 'style': 'Sonnet', 'type': 'Poem'},
+            {'genre': 'Tragedy', 'title': 'Julius Caesar', 'year': 1623, 'type': 'Play'},
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
+        ])
+
+    def test_async_paginated_object_view(self):
+        view = AsyncObjectView.as_view()
+
+        response = async_to_sync(view)(factory.get('/', {'offset': 2})).render()
+
+        self.assertEqual(list(response.data['results'].keys()), ['Play', 'Poem'])
+        self.assertEqual(len(response.data['results']['Play']), 2)
+        self.assertEqual(len(response.data['results']['Poem']), 1)
+        self.assertEqual(response.data['highest_count'], 4)
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(response.data['next'], None)
+
+    def test_async_two_phase_fetch(self):
+        view = AsyncTwoPhaseFlatView.as_view()
+
+        response = async_to_sync(view)(factory.get('/')).render()
+
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(response.data['results'], [
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
+            {'genre': 'Tragedy', 'title': 'Romeo And Juliet', 'year': 1597, 'type': 'Play'},
+        ])
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=2&offset=2')
+
+    def test_async_method_not_allowed(self):
+        view = AsyncObjectView.as_view()
+
+        response = async_to_sync(view)(factory.post('/', {}, format='json')).render()
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_async_viewset(self):
+        client = APIClient()
+        response = client.get('/flat/', format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 6)
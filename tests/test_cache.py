@@ -0,0 +1,256 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework import status
+
+from .utils import MultipleModelTestCase
+from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination
+from .models import Author, Play, Poem
+from .serializers import PlaySerializer, PoemSerializer, PlayWithAuthorSerializer
+from drf_multiple_model.cache import get_version_key, watched_models
+from drf_multiple_model.views import FlatMultipleModelAPIView, ObjectMultipleModelAPIView
+
+
+factory = APIRequestFactory()
+
+
+class CachedFlatView(FlatMultipleModelAPIView):
+    cache_timeout = 60
+    sorting_fields = ['title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+class CachedObjectView(ObjectMultipleModelAPIView):
+    cache_timeout = 60
+    cache_per_user = True
+    querylist = (
+        {
+            'queryset': Play.objects.select_related('author'),
+            'serializer_class': PlayWithAuthorSerializer,
+            'cache_models': [Author],
+        },
+    )
+
+
+class LimitPagination(MultipleModelLimitOffsetPagination):
+    default_limit = 2
+
+
+class ItemCachedObjectView(ObjectMultipleModelAPIView):
+    item_cache_timeout = 60
+    pagination_class = LimitPagination
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+        {'queryset': Poem.objects.filter(style="Narrative"), 'serializer_class': PoemSerializer,
+         'label': 'Narrative', 'cache_timeout': None},
+    )
+
+
+class ObjectCachedFlatView(FlatMultipleModelAPIView):
+    object_cache_timeout = 60
+    sorting_fields = ['title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer, 'cache_version_field': 'year'},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+class ResponseCacheTests(MultipleModelTestCase):
+    def test_cached_response(self):
+        view = CachedFlatView.as_view()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/')).render()
+
+        # A cache hit skips all of the querying
+        with self.assertNumQueries(0):
+            cached_response = view(factory.get('/')).render()
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+
+        # Different query parameters are cached separately
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'o': '-title'})).render()
+
+        self.assertEqual(response.data, list(reversed(cached_response.data)))
+
+    def test_cache_invalidation(self):
+        view = CachedFlatView.as_view()
+        view(factory.get('/')).render()
+
+        Poem.objects.create(title='A New Sonnet', style='Sonnet', author=Author.objects.create(name='New Poet'))
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(len(response.data), 7)
+        self.assertIn('A New Sonnet', [datum['title'] for datum in response.data])
+
+        Play.objects.filter(title='Julius Caesar').delete()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(len(response.data), 6)
+
+    def test_cache_models(self):
+        """
+        Changes to models listed in `cache_models` should also invalidate the cache
+        """
+        view = CachedObjectView.as_view()
+        view(factory.get('/')).render()
+
+        with self.assertNumQueries(0):
+            view(factory.get('/')).render()
+
+        author = Author.objects.get(name='Play Shakespeare 1')
+        author.name = 'William Shakespeare'
+        author.save()
+
+        with self.assertNumQueries(1):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data['Play'][0]['author'], {'name': 'William Shakespeare'})
+
+    def test_cache_per_user(self):
+        view = CachedObjectView.as_view()
+        user = User.objects.create(username='reader')
+
+        view(factory.get('/')).render()
+
+        request = factory.get('/')
+        force_authenticate(request, user=user)
+        with self.assertNumQueries(1):
+            view(request).render()
+
+    def test_unwatched_models(self):
+        """
+        Only the models of cached views are watched for changes
+        """
+        CachedFlatView.as_view()(factory.get('/')).render()
+
+        with mock.patch('drf_multiple_model.cache.caches') as cache_handler:
+            User.objects.create(username='reader')
+            self.assertFalse(cache_handler.__getitem__.called)
+
+            Play.objects.filter(title='Julius Caesar').get().save()
+            self.assertTrue(cache_handler.__getitem__.called)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+        'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'responses'},
+    })
+    def test_cache_alias(self):
+        """
+        Model versions are kept in the same cache as the responses
+        """
+        view = CachedFlatView.as_view(cache_alias='responses')
+        self.addCleanup(watched_models[Play].discard, 'responses')
+        self.addCleanup(watched_models[Poem].discard, 'responses')
+        view(factory.get('/')).render()
+
+        self.assertEqual(caches['responses'].get(get_version_key(Play)), 1)
+        self.assertIsNone(caches['default'].get(get_version_key(Play)))
+
+        Play.objects.filter(title='Julius Caesar').delete()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(caches['responses'].get(get_version_key(Play)), 2)
+
+
+class ItemCacheTests(MultipleModelTestCase):
+    def test_cached_items(self):
+        view = ItemCachedObjectView.as_view()
+
+        # Each item is fetched and counted
+        with self.assertNumQueries(6):
+            response = view(factory.get('/')).render()
+
+        # Only the uncached item is queried again, and the cached items keep their counts
+        with self.assertNumQueries(2):
+            cached_response = view(factory.get('/')).render()
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cached_response.data['highest_count'], 4)
+        self.assertEqual(cached_response.data['overall_total'], 7)
+
+        # Pages are cached separately
+        with self.assertNumQueries(6):
+            response = view(factory.get('/', {'offset': 2})).render()
+
+        self.assertEqual(len(response.data['results']['Play']), 2)
+
+    def test_item_cache_params(self):
+        """
+        Items are cached regardless of the types parameter and the parameters of other labels
+        """
+        view = ItemCachedObjectView.as_view()
+        view(factory.get('/')).render()
+
+        # Only the Poem item (and the uncached item) are loaded again
+        with self.assertNumQueries(4):
+            response = view(factory.get('/', {'fields[Poem]': 'title'})).render()
+
+        self.assertEqual(response.data['results']['Poem'][0], {'title': "Shall I compare thee to a summer's day?"})
+
+        with self.assertNumQueries(0):
+            response = view(factory.get('/', {'types': 'Play,Poem'})).render()
+
+        self.assertEqual(list(response.data['results']), ['Play', 'Poem'])
+
+    def test_item_invalidation(self):
+        """
+        Changes to a model should only invalidate the items for that model
+        """
+        view = ItemCachedObjectView.as_view()
+        view(factory.get('/')).render()
+
+        Play.objects.filter(title='Julius Caesar').delete()
+
+        with self.assertNumQueries(4):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data['highest_count'], 3)
+        self.assertEqual(response.data['overall_total'], 6)
+        self.assertEqual(len(response.data['results']['Poem']), 2)
+
+
+class ObjectCacheTests(MultipleModelTestCase):
+    def test_cached_objects(self):
+        view = ObjectCachedFlatView.as_view()
+        to_representation = PlaySerializer.to_representation
+
+        with mock.patch.object(PlaySerializer, 'to_representation', autospec=True,
+                               side_effect=to_representation) as serialize:
+            response = view(factory.get('/')).render()
+            self.assertEqual(serialize.call_count, 4)
+
+            # Cached representations are reused (items without a version field are serialized as usual)
+            serialize.reset_mock()
+            cached_response = view(factory.get('/')).render()
+            self.assertEqual(serialize.call_count, 0)
+            self.assertEqual(cached_response.data, response.data)
+
+            # Only objects with a new version are serialized again
+            Play.objects.filter(title='Julius Caesar').update(year=1599, genre='History')
+            serialize.reset_mock()
+            response = view(factory.get('/')).render()
+            self.assertEqual(serialize.call_count, 1)
+
+        self.assertIn(
+            {'title': 'Julius Caesar', 'genre': 'History', 'year': 1599, 'type': 'Play'},
+            response.data
+        )
+        self.assertEqual(len(response.data), 6)
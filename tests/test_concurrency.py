@@ -0,0 +1,160 @@
+import threading
+
+from rest_framework.test import APIRequestFactory
+from rest_framework import status
+
+from .utils import MultipleModelTransactionTestCase
+from .models import Play, Poem
+from .serializers import PlaySerializer, PoemSerializer
+from drf_multiple_model.views import ObjectMultipleModelAPIView, FlatMultipleModelAPIView
+from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination, FlatMultipleModelLimitOffsetPagination, \
+    MultipleModelLabelLimitOffsetPagination
+
+
+factory = APIRequestFactory()
+
+
+class ThreadRecordingSerializer(PoemSerializer):
+    threads = set()
+
+    def to_representation(self, instance):
+        self.threads.add(threading.current_thread().ident)
+        return super(ThreadRecordingSerializer, self).to_representation(instance)
+
+
+class ConcurrentObjectView(ObjectMultipleModelAPIView):
+    max_workers = 2
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': ThreadRecordingSerializer},
+    )
+
+
+class LimitPagination(MultipleModelLimitOffsetPagination):
+    default_limit = 2
+
+
+class ConcurrentPaginatedObjectView(ConcurrentObjectView):
+    pagination_class = LimitPagination
+
+
+class ThreadRecordingPagination(LimitPagination):
+    threads = []
+
+    def get_count(self, queryset):
+        self.threads.append(threading.current_thread().ident)
+        return super(ThreadRecordingPagination, self).get_count(queryset)
+
+
+class CombinedCountPagination(ThreadRecordingPagination):
+    combine_counts = True
+
+
+class LabelLimitPagination(MultipleModelLabelLimitOffsetPagination):
+    default_limit = 2
+
+
+class ThreadRecordingLabelPagination(LabelLimitPagination):
+    threads = []
+
+    def get_count(self, queryset):
+        self.threads.append(threading.current_thread().ident)
+        return super(ThreadRecordingLabelPagination, self).get_count(queryset)
+
+
+class ConcurrentLabelPaginatedObjectView(ConcurrentObjectView):
+    pagination_class = LabelLimitPagination
+
+
+class FlatLimitPagination(FlatMultipleModelLimitOffsetPagination):
+    default_limit = 3
+
+
+class ConcurrentSortedFlatView(FlatMultipleModelAPIView):
+    max_workers = 2
+    pagination_class = FlatLimitPagination
+    sorting_fields = ['title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
+class ConcurrencyTests(MultipleModelTransactionTestCase):
+    def test_concurrent_object_view(self):
+        """
+        Querylist items should be evaluated in worker threads, but returned in querylist order
+        """
+        ThreadRecordingSerializer.threads.clear()
+        view = ConcurrentObjectView.as_view()
+
+        response = view(factory.get('/')).render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(response.data.keys()), ['Play', 'Poem'])
+        self.assertEqual(len(response.data['Play']), 4)
+        self.assertEqual(len(response.data['Poem']), 3)
+        self.assertTrue(ThreadRecordingSerializer.threads)
+        self.assertNotIn(threading.current_thread().ident, ThreadRecordingSerializer.threads)
+
+    def test_concurrent_pagination(self):
+        """
+        The pagination state of each querylist item should be combined as if evaluated in order
+        """
+        view = ConcurrentPaginatedObjectView.as_view()
+
+        response = view(factory.get('/', {'offset': 2})).render()
+
+        self.assertEqual(len(response.data['results']['Play']), 2)
+        self.assertEqual(len(response.data['results']['Poem']), 1)
+        self.assertEqual(response.data['highest_count'], 4)
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(response.data['previous'], 'http://testserver/?limit=2')
+        self.assertEqual(response.data['next'], None)
+
+    def test_concurrent_counts(self):
+        """
+        Each querylist item should be counted in the worker thread that evaluated it
+        """
+        for pagination_class in (ThreadRecordingPagination, ThreadRecordingLabelPagination):
+            del pagination_class.threads[:]
+            view = ConcurrentObjectView.as_view(pagination_class=pagination_class)
+
+            response = view(factory.get('/')).render()
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(pagination_class.threads), 2)
+            self.assertNotIn(threading.current_thread().ident, pagination_class.threads)
+
+    def test_concurrent_combined_counts(self):
+        """
+        Combined counts are still made once every item is evaluated, in a single query
+        """
+        del CombinedCountPagination.threads[:]
+        view = ConcurrentObjectView.as_view(pagination_class=CombinedCountPagination)
+
+        response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(CombinedCountPagination.threads, [])
+
+    def test_concurrent_label_pagination(self):
+        view = ConcurrentLabelPaginatedObjectView.as_view()
+
+        response = view(factory.get('/', {'Play.limit': 3, 'Poem.offset': 2})).render()
+
+        self.assertEqual(response.data['counts'], {'Play': 4, 'Poem': 3})
+        self.assertEqual(len(response.data['results']['Play']), 3)
+        self.assertEqual(len(response.data['results']['Poem']), 1)
+        self.assertEqual(response.data['next']['Play'], 'http://testserver/?Play.limit=3&Play.offset=3&Poem.offset=2')
+        self.assertEqual(response.data['previous']['Poem'], 'http://testserver/?Play.limit=3&Poem.limit=2')
+
+    def test_concurrent_sorted_flat_view(self):
+        view = ConcurrentSortedFlatView.as_view()
+
+        response = view(factory.get('/', {'offset': 3})).render()
+
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            'As a decrepit father takes delight', 'Julius Caesar', 'Romeo And Juliet',
+        ])
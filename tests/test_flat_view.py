@@ -1,4 +1,6 @@
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from django.conf.urls import url
 from django.core.cache import cache
@@ -8,8 +10,9 @@ from rest_framework import status, filters
 from .utils import MultipleModelTestCase
 from .models import Play, Poem, Author
 from .serializers import PlaySerializer, PoemSerializer, PlayWithAuthorSerializer, PoemWithAuthorSerializer, \
-    AuthorListSerializer
+    AuthorListSerializer, AuthorSerializer, PlayTitleAsNameSerializer, PlayTitleSerializer
 from drf_multiple_model.views import FlatMultipleModelAPIView
+from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination
 
 factory = APIRequestFactory()
 
@@ -50,6 +53,55 @@ class ReversedSortingMultipleFieldsFlatView(SortingFlatView):
     sorting_fields = ['-type', 'title']
 
 
+class DatabaseSortedFlatView(SortedFlatView):
+    sort_in_database = True
+
+
+class DatabaseReversedFlatView(ReversedFlatView):
+    sort_in_database = True
+
+
+class DatabaseSortingFlatView(SortingFlatView):
+    sort_in_database = True
+
+
+class DatabaseSortingFieldsMapView(FlatMultipleModelAPIView):
+    sorting_fields = ['-name']
+    sort_in_database = True
+
+    querylist = (
+        {
+            'queryset': Play.objects.all(),
+            'serializer_class': PlayTitleAsNameSerializer,
+            'sorting_fields_map': {'name': 'title'},
+        },
+        {'queryset': Author.objects.filter(name__startswith='Poem'), 'serializer_class': AuthorSerializer},
+    )
+
+
+class UnionFlatView(FlatMultipleModelAPIView):
+    union_fields = ['title']
+    sorting_fields = ['-title']
+
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlayTitleSerializer},
+        {
+            'queryset': Author.objects.filter(name__startswith='Poem'),
+            'serializer_class': AuthorSerializer,
+            'union_fields_map': {'title': 'name'},
+        },
+    )
+
+
+class UnionPagination(MultipleModelLimitOffsetPagination):
+    default_limit = 3
+
+
+class PaginatedUnionFlatView(UnionFlatView):
+    pagination_class = UnionPagination
+    sorting_fields = ['type', 'title']
+
+
 class SortingFlatViewListData(FlatMultipleModelAPIView):
     sorting_field = 'plays'
     querylist = (
@@ -487,6 +539,130 @@ class TestMMFlatViews(MultipleModelTestCase):
             )
         )
 
+    def test_database_sorted_flat(self):
+        """
+        Sorting in the database and merging should give the same results as sorting in python
+        """
+        for view_class, expected in (
+            (DatabaseSortedFlatView, self.sorted_results),
+            (DatabaseReversedFlatView, list(reversed(self.sorted_results))),
+        ):
+            view = view_class.as_view()
+
+            request = factory.get('/')
+            with self.assertNumQueries(2) as queries:
+                response = view(request).render()
+
+            self.assertIn('ORDER BY', queries.captured_queries[0]['sql'])
+            self.assertEqual(response.data, expected)
+
+    def test_database_sorting_by_request_parameter(self):
+        """
+        Request sorting parameters (including lookups and `type`) should work when sorting in the database
+        """
+        view = DatabaseSortingFlatView.as_view()
+
+        request = factory.get('/?o=-author')
+        with self.assertNumQueries(2):
+            response = view(request).render()
+
+        self.assertEqual(response.data, list(reversed(self.sorted_results_w_author)))
+
+        request = factory.get('/?o=type,-title')
+        with self.assertNumQueries(2):
+            response = view(request).render()
+
+        self.assertEqual(
+            response.data, sorted(
+                sorted(self.sorted_results_w_author, key=lambda x: x['title'], reverse=True),
+                key=lambda x: x['type']
+            )
+        )
+
+    def test_database_sorting_fields_map(self):
+        """
+        A querylist item's `sorting_fields_map` should map the sorting field onto its model's column
+        """
+        view = DatabaseSortingFieldsMapView.as_view()
+
+        request = factory.get('/')
+        with self.assertNumQueries(2):
+            response = view(request).render()
+
+        self.assertEqual([datum['name'] for datum in response.data], [
+            'Romeo And Juliet',
+            'Poem Shakespeare 3',
+            'Poem Shakespeare 2',
+            'Poem Shakespeare 1',
+            'Julius Caesar',
+            'As You Like It',
+            "A Midsummer Night's Dream",
+        ])
+
+    def test_union_flat_view(self):
+        """
+        With `union_fields`, the whole querylist should be evaluated in a single query
+        """
+        view = UnionFlatView.as_view()
+
+        request = factory.get('/')
+        with self.assertNumQueries(1) as queries:
+            response = view(request).render()
+
+        self.assertIn('UNION ALL', queries.captured_queries[0]['sql'])
+        self.assertEqual(response.data, [
+            {'title': 'Romeo And Juliet', 'type': 'Play'},
+            {'name': 'Poem Shakespeare 3', 'type': 'Author'},
+            {'name': 'Poem Shakespeare 2', 'type': 'Author'},
+            {'name': 'Poem Shakespeare 1', 'type': 'Author'},
+            {'title': 'Julius Caesar', 'type': 'Play'},
+            {'title': 'As You Like It', 'type': 'Play'},
+            {'title': "A Midsummer Night's Dream", 'type': 'Play'},
+        ])
+
+    def test_union_sparse_fields(self):
+        """
+        Rows of a union query should be serialized with the requested sparse fieldsets
+        """
+        view = UnionFlatView.as_view()
+
+        request = factory.get('/', {'fields[Author]': ''})
+        with self.assertNumQueries(1):
+            response = view(request).render()
+
+        self.assertEqual(response.data[:3], [
+            {'title': 'Romeo And Juliet', 'type': 'Play'},
+            {'type': 'Author'},
+            {'type': 'Author'},
+        ])
+
+    def test_paginated_union_flat_view(self):
+        """
+        Pagination of a union query should be done in SQL, with a single count
+        """
+        view = PaginatedUnionFlatView.as_view()
+
+        request = factory.get('/', {'offset': 3})
+        with self.assertNumQueries(2):
+            response = view(request).render()
+
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(response.data['results'], [
+            {'title': 'A Midsummer Night\'s Dream', 'type': 'Play'},
+            {'title': 'As You Like It', 'type': 'Play'},
+            {'title': 'Julius Caesar', 'type': 'Play'},
+        ])
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=3&offset=6')
+
+    def test_union_wrong_sorting(self):
+        """
+        Sorting a union query by a field that isn't one of the `union_fields` should fail
+        """
+        view = UnionFlatView.as_view()
+
+        request = factory.get('/', {'o': 'year'})
+        self.assertRaises(ValidationError, view, request)
+
     def test_ordered_wrong_sorting(self):
         """
         Sorting by a non-shared field should throw a KeyError
@@ -562,3 +738,52 @@ class TestMMFlatViews(MultipleModelTestCase):
             {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
             {'title': "As a decrepit father takes delight", 'style': 'Sonnet', 'type': 'Poem'},
         ])
+
+    def test_sparse_fields(self):
+        """
+        Clients can ask for some of the fields of each label, which are then the only ones loaded
+        """
+        view = SortedFlatView.as_view()
+
+        request = factory.get('/', {'fields[Play]': 'title,year', 'fields[Poem]': 'title'})
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request).render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'title': "A Midsummer Night's Dream", 'year': 1600, 'type': 'Play'},
+            {'title': 'As You Like It', 'year': 1623, 'type': 'Play'},
+            {'title': "As a decrepit father takes delight", 'type': 'Poem'},
+            {'title': 'Julius Caesar', 'year': 1623, 'type': 'Play'},
+            {'title': 'Romeo And Juliet', 'year': 1597, 'type': 'Play'},
+            {'title': "Shall I compare thee to a summer's day?", 'type': 'Poem'},
+        ])
+
+        self.assertEqual([query['sql'].split(' FROM ')[0] for query in queries], [
+            'SELECT "tests_play"."id", "tests_play"."title", "tests_play"."year"',
+            'SELECT "tests_poem"."id", "tests_poem"."title"',
+        ])
+
+    def test_requested_types(self):
+        """
+        Clients can limit the results to some labels, without evaluating the other querysets
+        """
+        view = SortedFlatView.as_view()
+
+        with self.assertNumQueries(1):
+            response = view(factory.get('/', {'types': 'Poem'})).render()
+
+        self.assertEqual(response.data, [
+            {'title': "As a decrepit father takes delight", 'style': 'Sonnet', 'type': 'Poem'},
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
+        ])
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'types': 'Play,Poem,Novel'})).render()
+
+        self.assertEqual(len(response.data), 6)
+
+        with self.assertNumQueries(0):
+            response = view(factory.get('/', {'types': 'Novel'})).render()
+
+        self.assertEqual(response.data, [])
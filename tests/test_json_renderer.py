@@ -0,0 +1,142 @@
+import json
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework import renderers
+
+from .utils import MultipleModelTestCase
+from .models import Play, Poem
+from .serializers import PlaySerializer, PoemSerializer
+from drf_multiple_model.pagination import FlatMultipleModelLimitOffsetPagination, MultipleModelCursorPagination
+from drf_multiple_model.renderers import EncodedDict, MultipleModelJSONRenderer
+from drf_multiple_model.views import FlatMultipleModelAPIView, ObjectMultipleModelAPIView
+
+
+factory = APIRequestFactory()
+
+# The browsable API needs a url conf
+urlpatterns = []
+
+
+class EncodedFlatView(FlatMultipleModelAPIView):
+    renderer_classes = (MultipleModelJSONRenderer, renderers.BrowsableAPIRenderer)
+    sorting_fields = ['title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+class FlatLimitPagination(FlatMultipleModelLimitOffsetPagination):
+    default_limit = 2
+
+
+class PaginatedEncodedFlatView(EncodedFlatView):
+    pagination_class = FlatLimitPagination
+
+
+class CursorPagination(MultipleModelCursorPagination):
+    page_size = 2
+
+
+class CursorEncodedFlatView(EncodedFlatView):
+    pagination_class = CursorPagination
+
+
+class EncodedObjectView(ObjectMultipleModelAPIView):
+    renderer_classes = (MultipleModelJSONRenderer,)
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+class ObjectCachedEncodedFlatView(EncodedFlatView):
+    object_cache_timeout = 60
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer, 'cache_version_field': 'year'},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class MultipleModelJSONRendererTests(MultipleModelTestCase):
+    def assertRendersLikeJSONRenderer(self, response):
+        """
+        The spliced response should be exactly what rest_framework's JSONRenderer renders
+        """
+        self.assertEqual(response.content, renderers.JSONRenderer().render(response.data))
+
+    def test_flat_view(self):
+        response = EncodedFlatView.as_view()(factory.get('/')).render()
+
+        self.assertRendersLikeJSONRenderer(response)
+        self.assertTrue(all(isinstance(datum, EncodedDict) for datum in response.data))
+        self.assertEqual(json.loads(response.content.decode('utf-8'))[0], {
+            'title': "A Midsummer Night's Dream", 'genre': 'Comedy', 'year': 1600, 'type': 'Play'
+        })
+
+    def test_paginated_flat_view(self):
+        response = PaginatedEncodedFlatView.as_view()(factory.get('/', {'offset': 2})).render()
+
+        self.assertRendersLikeJSONRenderer(response)
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['overall_total'], 6)
+
+    def test_cursor_paginated_flat_view(self):
+        view = CursorEncodedFlatView.as_view()
+        response = view(factory.get('/')).render()
+
+        self.assertRendersLikeJSONRenderer(response)
+
+        response = view(factory.get(response.data['next'])).render()
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            'As a decrepit father takes delight',
+            'Julius Caesar',
+        ])
+
+    def test_object_view(self):
+        response = EncodedObjectView.as_view()(factory.get('/')).render()
+
+        self.assertRendersLikeJSONRenderer(response)
+        self.assertNotIn('type', json.loads(response.content.decode('utf-8'))['Play'][0])
+
+    def test_indented(self):
+        media_type = 'application/json; indent=4'
+        response = EncodedFlatView.as_view()(factory.get('/', HTTP_ACCEPT=media_type)).render()
+
+        self.assertEqual(response.content, renderers.JSONRenderer().render(response.data, media_type))
+
+    def test_non_string_keys(self):
+        """
+        Non-string keys are encoded as `json.dumps` encodes them
+        """
+        data = {None: 1, True: [EncodedDict({'a': 1}, b'{"a":1}')], 2: {1.5: 'x', False: None}}
+
+        self.assertEqual(
+            MultipleModelJSONRenderer().render(data),
+            renderers.JSONRenderer().render({None: 1, True: [{'a': 1}], 2: {1.5: 'x', False: None}})
+        )
+
+    def test_other_renderers(self):
+        response = EncodedFlatView.as_view()(factory.get('/', {'format': 'api'})).render()
+
+        self.assertFalse(any(isinstance(datum, EncodedDict) for datum in response.data))
+
+    def test_cached_encoded_objects(self):
+        """
+        Pre-encoded representations are cached with object caching
+        """
+        view = ObjectCachedEncodedFlatView.as_view()
+        encode_datum = MultipleModelJSONRenderer.encode_datum
+
+        with mock.patch.object(MultipleModelJSONRenderer, 'encode_datum', autospec=True,
+                               side_effect=encode_datum) as encode:
+            response = view(factory.get('/')).render()
+            self.assertEqual(encode.call_count, 6)
+
+            encode.reset_mock()
+            cached_response = view(factory.get('/')).render()
+            self.assertEqual(encode.call_count, 2)
+
+        self.assertEqual(cached_response.content, response.content)
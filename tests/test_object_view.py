@@ -36,6 +36,26 @@ class CustomLabelView(ObjectMultipleModelAPIView):
     )
 
 
+class ValuesView(ObjectMultipleModelAPIView):
+    querylist = (
+        {'queryset': Play.objects.order_by('year', 'pk'), 'values': ['title', 'year']},
+        {
+            'queryset': Poem.objects.filter(style="Sonnet"),
+            'values': {'title': 'title', 'poet': 'author__name'},
+            'transform': lambda row: dict(row, title=row['title'].upper()),
+        },
+    )
+
+
+class SwappedValuesView(ObjectMultipleModelAPIView):
+    querylist = (
+        {
+            'queryset': Play.objects.order_by('year', 'pk'),
+            'values': {'title': 'genre', 'genre': 'title', 'year': 'year'},
+        },
+    )
+
+
 class DynamicQueryView(ObjectMultipleModelAPIView):
     def get_querylist(self):
         title = self.kwargs['play'].replace('-', ' ')
@@ -368,3 +388,41 @@ class TestMMObjectViews(MultipleModelTestCase):
         client = APIClient()
         response = client.get('/', format='api')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_values(self):
+        """
+        Items with `values` return their rows as they are, without a serializer
+        """
+        view = ValuesView.as_view()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'Play': [
+                {'title': 'Romeo And Juliet', 'year': 1597},
+                {'title': "A Midsummer Night's Dream", 'year': 1600},
+                {'title': 'Julius Caesar', 'year': 1623},
+                {'title': 'As You Like It', 'year': 1623},
+            ],
+            'Poem': [
+                {'title': "SHALL I COMPARE THEE TO A SUMMER'S DAY?", 'poet': 'Poem Shakespeare 1'},
+                {'title': "AS A DECREPIT FATHER TAKES DELIGHT", 'poet': 'Poem Shakespeare 2'},
+            ]
+        })
+
+    def test_renamed_values(self):
+        """
+        Values can be renamed to the names of other model fields
+        """
+        view = SwappedValuesView.as_view()
+
+        response = view(factory.get('/')).render()
+        self.assertEqual(response.data['Play'][:2], [
+            {'title': 'Tragedy', 'genre': 'Romeo And Juliet', 'year': 1597},
+            {'title': 'Comedy', 'genre': "A Midsummer Night's Dream", 'year': 1600},
+        ])
+
+        response = view(factory.get('/', {'fields[Play]': 'genre'})).render()
+        self.assertEqual(response.data['Play'][0], {'genre': 'Romeo And Juliet'})
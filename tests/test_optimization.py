@@ -0,0 +1,208 @@
+import warnings
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory
+
+from .utils import MultipleModelTestCase
+from .models import Author, Play, Poem
+from .serializers import (
+    AuthorListSerializer, PlaySerializer, PlayWithAuthorSerializer, PoemSerializer, PoemWithAuthorSerializer
+)
+from drf_multiple_model.optimization import get_loaded_fields, get_related_lookups
+from drf_multiple_model.views import FlatMultipleModelAPIView, ObjectMultipleModelAPIView
+
+
+factory = APIRequestFactory()
+
+
+class PlayAuthorNameSerializer(serializers.ModelSerializer):
+    author_name = serializers.CharField(source='author.name')
+
+    class Meta:
+        model = Play
+        fields = ('title', 'author', 'author_name')
+
+
+class AuthorWithPlayAuthorsSerializer(serializers.ModelSerializer):
+    plays = PlayWithAuthorSerializer(many=True)
+    poem_ids = serializers.PrimaryKeyRelatedField(source='poems', many=True, read_only=True)
+
+    class Meta:
+        model = Author
+        fields = ('name', 'plays', 'poem_ids')
+
+
+class OptimizedFlatView(FlatMultipleModelAPIView):
+    optimize_related = True
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlayWithAuthorSerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemWithAuthorSerializer},
+    )
+
+
+class OptimizedObjectView(ObjectMultipleModelAPIView):
+    optimize_related = True
+    querylist = (
+        {'queryset': Author.objects.all(), 'serializer_class': AuthorListSerializer},
+        {'queryset': Play.objects.all(), 'serializer_class': PlayWithAuthorSerializer, 'optimize_related': False},
+    )
+
+
+class PlayTitleWithMethodSerializer(serializers.ModelSerializer):
+    century = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Play
+        fields = ('title', 'century')
+
+    def get_century(self, play):
+        return play.year // 100 + 1
+
+
+class OptimizedColumnsView(ObjectMultipleModelAPIView):
+    optimize_columns = True
+    querylist = (
+        {'queryset': Play.objects.select_related('author'), 'serializer_class': PlaySerializer, 'label': 'Play'},
+        {'queryset': Play.objects.all(), 'serializer_class': PlayTitleWithMethodSerializer, 'label': 'Century'},
+        {
+            'queryset': Poem.objects.all(),
+            'serializer_class': PoemSerializer,
+            'defer': ['author'],
+            'optimize_columns': False,
+        },
+        {'queryset': Author.objects.all(), 'serializer_class': AuthorListSerializer, 'only': ['id', 'name']},
+    )
+
+
+class RelatedLookupTests(MultipleModelTestCase):
+    def test_no_relations(self):
+        self.assertEqual(get_related_lookups(PlaySerializer(), Play), ([], []))
+
+    def test_nested_serializers(self):
+        self.assertEqual(get_related_lookups(PlayWithAuthorSerializer(), Play), (['author'], []))
+        self.assertEqual(get_related_lookups(AuthorListSerializer(), Author), ([], ['plays', 'poems']))
+
+    def test_sources(self):
+        """
+        `source` paths are followed, while primary key related fields only need the foreign key
+        """
+        self.assertEqual(get_related_lookups(PlayAuthorNameSerializer(), Play), (['author'], []))
+        self.assertEqual(get_related_lookups(PoemSerializer(), Poem), ([], []))
+
+    def test_nested_to_many(self):
+        self.assertEqual(
+            get_related_lookups(AuthorWithPlayAuthorsSerializer(), Author),
+            ([], ['plays__author', 'poems'])
+        )
+
+
+class LoadedFieldTests(MultipleModelTestCase):
+    def test_loaded_fields(self):
+        self.assertEqual(get_loaded_fields(PlaySerializer(), Play), ['genre', 'title', 'year'])
+        self.assertEqual(get_loaded_fields(PlayAuthorNameSerializer(), Play), ['title', 'author'])
+        self.assertEqual(get_loaded_fields(AuthorListSerializer(), Author), ['name'])
+
+    def test_unknown_fields(self):
+        self.assertEqual(get_loaded_fields(PlayTitleWithMethodSerializer(), Play), None)
+
+
+class OptimizeRelatedTests(MultipleModelTestCase):
+    def test_select_related(self):
+        view = OptimizedFlatView.as_view()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[0]['author'], {'name': 'Play Shakespeare 1'})
+
+    def test_prefetch_related(self):
+        view = OptimizedObjectView.as_view()
+
+        # One query for the authors and one for each of their relations, but one per play
+        # for the unoptimized item
+        with self.assertNumQueries(3 + 1 + 4):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data['Author'][0]['plays'][0]['title'], 'Romeo And Juliet')
+
+    @override_settings(DEBUG=True)
+    def test_per_row_query_warning(self):
+        class PlayWithAuthorPlaysSerializer(PlaySerializer):
+            author_plays = serializers.SerializerMethodField()
+
+            class Meta(PlaySerializer.Meta):
+                fields = PlaySerializer.Meta.fields + ('author_plays',)
+
+            def get_author_plays(self, play):
+                return play.author.plays.count()
+
+        class PerRowQueryView(OptimizedFlatView):
+            querylist = (
+                {'queryset': Play.objects.all(), 'serializer_class': PlayWithAuthorPlaysSerializer},
+            )
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            OptimizedFlatView.as_view()(factory.get('/')).render()
+            self.assertEqual(caught, [])
+
+            PerRowQueryView.as_view()(factory.get('/')).render()
+
+        self.assertEqual(len(caught), 1)
+        self.assertEqual(caught[0].category, RuntimeWarning)
+        self.assertIn('8 queries while serializing 4 Play objects', str(caught[0].message))
+
+    def test_memoized_inspections(self):
+        """
+        Serializers are only inspected once for each sparse fieldset, rather than on every request
+        """
+        class OptimizedColumnsFlatView(OptimizedFlatView):
+            optimize_columns = True
+
+        view = OptimizedColumnsFlatView.as_view()
+        get_item_serializer = OptimizedColumnsFlatView.get_item_serializer
+
+        with mock.patch.object(OptimizedColumnsFlatView, 'get_item_serializer', autospec=True,
+                               side_effect=get_item_serializer) as get_serializer:
+            for params in ({}, {'fields[Play]': 'title'}):
+                view(factory.get('/', params)).render()
+
+                # The serializers are only built to serialize the data
+                get_serializer.reset_mock()
+                with self.assertNumQueries(2):
+                    response = view(factory.get('/', params)).render()
+                self.assertEqual(get_serializer.call_count, 2)
+
+        self.assertEqual(response.data[0], {'title': 'Romeo And Juliet', 'type': 'Play'})
+
+
+class OptimizeColumnsTests(MultipleModelTestCase):
+    def test_optimize_columns(self):
+        view = OptimizedColumnsView.as_view()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = view(factory.get('/')).render()
+
+        selects = [query['sql'].split(' FROM ')[0] for query in queries]
+        play, century, poem, author = selects[:4]
+
+        # Relations followed with select_related are still loaded
+        self.assertEqual(play.split(', "tests_author"')[0], (
+            'SELECT "tests_play"."id", "tests_play"."genre", "tests_play"."title", '
+            '"tests_play"."year", "tests_play"."author_id"'
+        ))
+        self.assertIn('"tests_author"."name"', play)
+
+        # Fields read by method fields can't be told
+        self.assertIn('"tests_play"."genre"', century)
+
+        self.assertEqual(poem, 'SELECT "tests_poem"."id", "tests_poem"."title", "tests_poem"."style"')
+        self.assertEqual(author, 'SELECT "tests_author"."id", "tests_author"."name"')
+
+        self.assertEqual(response.data['Play'][0], {'genre': 'Tragedy', 'title': 'Romeo And Juliet', 'year': 1597})
+        self.assertEqual(len(response.data['Author']), 7)
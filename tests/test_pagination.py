@@ -1,3 +1,8 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIRequestFactory
 from rest_framework import status
 
@@ -5,7 +10,9 @@ from .utils import MultipleModelTestCase
 from .models import Play, Poem
 from .serializers import PlaySerializer, PoemSerializer
 from drf_multiple_model.views import ObjectMultipleModelAPIView, FlatMultipleModelAPIView
-from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination
+from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination, FlatMultipleModelLimitOffsetPagination, \
+    MultipleModelCursorPagination, MultipleModelLabelLimitOffsetPagination
+from drf_multiple_model.sorting import SortPlan
 
 
 factory = APIRequestFactory()
@@ -31,6 +38,102 @@ class FlatLimitPaginationView(FlatMultipleModelAPIView):
     )
 
 
+class CombinedCountPagination(LimitPagination):
+    combine_counts = True
+
+
+class CachedCountPagination(LimitPagination):
+    count_cache_timeout = 60
+
+
+class EstimatedCountPagination(LimitPagination):
+    @staticmethod
+    def count_estimator(queryset):
+        # Pretend the Play table is too big to count
+        return 1000 if queryset.model is Play else None
+
+
+class UncountedPagination(LimitPagination):
+    include_counts = False
+
+
+class FlatLimitPagination(FlatMultipleModelLimitOffsetPagination):
+    default_limit = 2
+
+
+class UncountedFlatLimitPagination(FlatLimitPagination):
+    include_counts = False
+
+
+class FlatMergedPaginationView(FlatMultipleModelAPIView):
+    pagination_class = FlatLimitPagination
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
+class SortedFlatMergedPaginationView(FlatMergedPaginationView):
+    sorting_fields = ['title']
+
+
+class LabelLimitPagination(MultipleModelLabelLimitOffsetPagination):
+    default_limit = 2
+
+
+class ObjectLabelPaginationView(ObjectLimitPaginationView):
+    pagination_class = LabelLimitPagination
+
+
+class CachedObjectLabelPaginationView(ObjectLabelPaginationView):
+    item_cache_timeout = 60
+
+
+class PythonSortedFlatLimitPagination(FlatLimitPagination):
+    requires_database_sorting = False
+
+
+class PythonSortedFlatMergedPaginationView(SortedFlatMergedPaginationView):
+    pagination_class = PythonSortedFlatLimitPagination
+
+
+class TwoPhaseFlatPaginationView(SortedFlatMergedPaginationView):
+    two_phase_fetch = True
+
+
+class TwoPhaseValuesFlatView(FlatMultipleModelAPIView):
+    two_phase_fetch = True
+    sorting_fields = ['-type', 'title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'values': ['title', 'year']},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer, 'label': 'Verse'},
+    )
+
+
+class CursorPagination(MultipleModelCursorPagination):
+    page_size = 2
+
+
+class CursorPaginationView(FlatMultipleModelAPIView):
+    pagination_class = CursorPagination
+    sorting_fields = ['title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
+class UnsortedCursorPaginationView(CursorPaginationView):
+    sorting_fields = None
+
+
+class ValuesCursorPaginationView(CursorPaginationView):
+    querylist = (
+        {'queryset': Play.objects.all(), 'values': ['title', 'year']},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
 class LimitPaginationTests(MultipleModelTestCase):
     def test_basic_object_pagination(self):
         view = ObjectLimitPaginationView.as_view()
@@ -111,3 +214,455 @@ class LimitPaginationTests(MultipleModelTestCase):
         # Check the new links
         self.assertEqual(response.data['previous'], 'http://testserver/?limit=2')
         self.assertEqual(response.data['next'], None)
+
+    def test_combined_counts(self):
+        """
+        `combine_counts` should count every queryset in a single query
+        """
+        view = ObjectLimitPaginationView.as_view(pagination_class=CombinedCountPagination)
+
+        with self.assertNumQueries(3):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data['highest_count'], 4)
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=2&offset=2')
+
+        # Filtering should be reflected in the counts
+        with self.assertNumQueries(3):
+            response = view(factory.get('/', {'offset': 2})).render()
+
+        self.assertEqual(len(response.data['results']['Poem']), 1)
+        self.assertEqual(response.data['overall_total'], 7)
+
+    def test_empty_querysets(self):
+        """
+        Querysets that can't match anything are counted as 0, without a query (or a cache key)
+        """
+        class EmptyItemsView(ObjectLimitPaginationView):
+            querylist = (
+                {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+                {'queryset': Poem.objects.none(), 'serializer_class': PoemSerializer},
+                {'queryset': Poem.objects.filter(pk__in=[]), 'serializer_class': PoemSerializer, 'label': 'Empty'},
+            )
+
+        for pagination_class in (CombinedCountPagination, CachedCountPagination):
+            cache.clear()
+            view = EmptyItemsView.as_view(pagination_class=pagination_class)
+
+            # The Play page and count
+            with self.assertNumQueries(2):
+                response = view(factory.get('/')).render()
+
+            self.assertEqual(response.data['highest_count'], 4)
+            self.assertEqual(response.data['overall_total'], 4)
+            self.assertEqual(response.data['results']['Poem'], [])
+
+    def test_cached_counts(self):
+        view = ObjectLimitPaginationView.as_view(pagination_class=CachedCountPagination)
+
+        with self.assertNumQueries(4):
+            response = view(factory.get('/')).render()
+
+        # Counts for the same queries come from the cache
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'offset': 2})).render()
+
+        self.assertEqual(response.data['highest_count'], 4)
+        self.assertEqual(response.data['overall_total'], 7)
+
+        cache.clear()
+        with self.assertNumQueries(4):
+            view(factory.get('/')).render()
+
+    def test_estimated_counts(self):
+        view = ObjectLimitPaginationView.as_view(pagination_class=EstimatedCountPagination)
+
+        # Only the Poem queryset is counted
+        with self.assertNumQueries(3):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data['highest_count'], 1000)
+        self.assertEqual(response.data['overall_total'], 1003)
+
+    def test_uncounted_pagination(self):
+        """
+        Without counts, next links should come from fetching an extra row per queryset
+        """
+        view = ObjectLimitPaginationView.as_view(pagination_class=UncountedPagination)
+
+        with self.assertNumQueries(2) as queries:
+            response = view(factory.get('/')).render()
+
+        self.assertIn('LIMIT 3', queries.captured_queries[0]['sql'])
+        self.assertEqual(list(response.data.keys()), ['next', 'previous', 'results'])
+        self.assertEqual(len(response.data['results']['Play']), 2)
+        self.assertEqual(len(response.data['results']['Poem']), 2)
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=2&offset=2')
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'offset': 2})).render()
+
+        self.assertEqual(len(response.data['results']['Play']), 2)
+        self.assertEqual(len(response.data['results']['Poem']), 1)
+        self.assertEqual(response.data['next'], None)
+        self.assertEqual(response.data['previous'], 'http://testserver/?limit=2')
+
+    def test_requested_types(self):
+        """
+        Labels that weren't requested aren't counted either
+        """
+        view = ObjectLimitPaginationView.as_view()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'types': 'Play'})).render()
+
+        self.assertEqual(response.data['highest_count'], 4)
+        self.assertEqual(response.data['overall_total'], 4)
+        self.assertEqual(list(response.data['results']), ['Play'])
+
+
+class FlatMergedPaginationTests(MultipleModelTestCase):
+    def test_sorted_merged_pagination(self):
+        view = SortedFlatMergedPaginationView.as_view()
+
+        request = factory.get('/')
+
+        # One count and one (sliced) select per queryset
+        with self.assertNumQueries(4) as queries:
+            response = view(request).render()
+
+        self.assertIn('LIMIT 2', queries.captured_queries[1]['sql'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The limit applies to the merged results, not each queryset
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            "A Lover's Complaint", "A Midsummer Night's Dream",
+        ])
+        self.assertEqual(response.data['overall_total'], 7)
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=2&offset=2')
+        self.assertEqual(response.data['previous'], None)
+
+        request = factory.get('/', {'offset': 2})
+        response = view(request).render()
+
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            'As You Like It', 'As a decrepit father takes delight',
+        ])
+
+        request = factory.get('/', {'offset': 6})
+        response = view(request).render()
+
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            "Shall I compare thee to a summer's day?",
+        ])
+        self.assertEqual(response.data['next'], None)
+        self.assertEqual(response.data['previous'], 'http://testserver/?limit=2&offset=4')
+
+    def test_uncounted_merged_pagination(self):
+        view = SortedFlatMergedPaginationView.as_view(pagination_class=UncountedFlatLimitPagination)
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'offset': 4})).render()
+
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            'Julius Caesar', 'Romeo And Juliet',
+        ])
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=2&offset=6')
+
+        response = view(factory.get('/', {'offset': 6})).render()
+
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['next'], None)
+
+    def test_unsorted_merged_pagination(self):
+        """
+        Without sorting fields, pages are cut out of the results in querylist order
+        """
+        view = FlatMergedPaginationView.as_view()
+
+        request = factory.get('/', {'offset': 3})
+        response = view(request).render()
+
+        self.assertEqual(response.data['results'], [
+            {'genre': 'Comedy', 'title': 'As You Like It', 'year': 1623, 'type': 'Play'},
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
+        ])
+        self.assertEqual(response.data['next'], 'http://testserver/?limit=2&offset=5')
+
+    def test_python_sorted_merged_pagination(self):
+        """
+        Without database sorting, every row is fetched (and not counted) and only the page is
+        picked out of the results with a bounded heap
+        """
+        request = factory.get('/', {'offset': 2})
+        sorted_response = SortedFlatMergedPaginationView.as_view()(request).render()
+
+        with mock.patch.object(SortPlan, 'sort', autospec=True, side_effect=SortPlan.sort) as sort:
+            with self.assertNumQueries(2):
+                response = PythonSortedFlatMergedPaginationView.as_view()(request).render()
+
+        self.assertFalse(sort.called)
+        self.assertEqual(response.data, sorted_response.data)
+
+
+class TwoPhaseFetchTests(MultipleModelTestCase):
+    def test_two_phase_pagination(self):
+        """
+        The keys of every row are sorted and paginated first, and only the objects on the
+        page are fetched and serialized
+        """
+        view = TwoPhaseFlatPaginationView.as_view()
+        to_representation = PlaySerializer.to_representation
+
+        for offset in (0, 2, 6):
+            request = factory.get('/', {'offset': offset})
+            expected = SortedFlatMergedPaginationView.as_view()(request).render()
+
+            with mock.patch.object(PlaySerializer, 'to_representation', autospec=True,
+                                   side_effect=to_representation) as serialize:
+                # One key query per queryset, and one `in_bulk` query per model on the page
+                with self.assertNumQueries(4 if offset < 6 else 3):
+                    response = view(request).render()
+
+            self.assertEqual(response.data, expected.data)
+            self.assertEqual(serialize.call_count, [datum['type'] for datum in response.data['results']].count('Play'))
+
+    def test_two_phase_values(self):
+        """
+        Values items and labels are sorted on like any other querylist item
+        """
+        view = TwoPhaseValuesFlatView.as_view()
+
+        with self.assertNumQueries(4):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual(response.data[:3], [
+            {'title': "A Lover's Complaint", 'style': 'Narrative', 'type': 'Verse'},
+            {'title': 'As a decrepit father takes delight', 'style': 'Sonnet', 'type': 'Verse'},
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Verse'},
+        ])
+        self.assertEqual(response.data[3:], [
+            {'title': "A Midsummer Night's Dream", 'year': 1600, 'type': 'Play'},
+            {'title': 'As You Like It', 'year': 1623, 'type': 'Play'},
+            {'title': 'Julius Caesar', 'year': 1623, 'type': 'Play'},
+            {'title': 'Romeo And Juliet', 'year': 1597, 'type': 'Play'},
+        ])
+
+        response = view(factory.get('/', {'o': '-year', 'types': 'Play'})).render()
+        self.assertEqual([datum['title'] for datum in response.data], [
+            'Julius Caesar', 'As You Like It', "A Midsummer Night's Dream", 'Romeo And Juliet',
+        ])
+
+    def test_two_phase_deleted_rows(self):
+        """
+        Rows deleted after their keys were loaded are left out of the page
+        """
+        view = TwoPhaseFlatPaginationView.as_view()
+        hydrate_keys = TwoPhaseFlatPaginationView.hydrate_keys
+
+        def delete_and_hydrate(self, keys, querylist, querysets):
+            Play.objects.filter(title="A Midsummer Night's Dream").delete()
+            return hydrate_keys(self, keys, querylist, querysets)
+
+        with mock.patch.object(TwoPhaseFlatPaginationView, 'hydrate_keys', delete_and_hydrate):
+            response = view(factory.get('/')).render()
+
+        self.assertEqual([datum['title'] for datum in response.data['results']], ["A Lover's Complaint"])
+        self.assertEqual(response.data['overall_total'], 7)
+
+    def test_two_phase_cursor_pagination(self):
+        view = TwoPhaseFlatPaginationView.as_view(pagination_class=CursorPagination)
+
+        with self.assertRaises(AssertionError):
+            view(factory.get('/'))
+
+
+class CursorPaginationTests(MultipleModelTestCase):
+    def get_pages(self, view, **params):
+        """
+        follows the `next` links, returning the titles on each page
+        """
+        pages = []
+        request = factory.get('/', params)
+
+        while True:
+            # At most one query per queryset, and no counts
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request).render()
+
+            self.assertLessEqual(len(queries), 2)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([datum['title'] for datum in response.data['results']])
+
+            if response.data['next'] is None:
+                return pages
+
+            request = factory.get(response.data['next'])
+
+    def test_sorted_cursor_pagination(self):
+        self.assertEqual(self.get_pages(CursorPaginationView.as_view()), [
+            ["A Lover's Complaint", "A Midsummer Night's Dream"],
+            ['As You Like It', 'As a decrepit father takes delight'],
+            ['Julius Caesar', 'Romeo And Juliet'],
+            ["Shall I compare thee to a summer's day?"],
+        ])
+
+    def test_values_cursor_pagination(self):
+        """
+        `values` items keep track of their pks for the cursor
+        """
+        self.assertEqual(self.get_pages(ValuesCursorPaginationView.as_view()), [
+            ["A Lover's Complaint", "A Midsummer Night's Dream"],
+            ['As You Like It', 'As a decrepit father takes delight'],
+            ['Julius Caesar', 'Romeo And Juliet'],
+            ["Shall I compare thee to a summer's day?"],
+        ])
+
+    def test_cursor_tie_breakers(self):
+        """
+        Without sorting fields, the type label and pk still give a stable order
+        """
+        CursorPagination.page_size = 3
+        try:
+            pages = self.get_pages(UnsortedCursorPaginationView.as_view())
+        finally:
+            CursorPagination.page_size = 2
+
+        self.assertEqual(pages, [
+            ['Romeo And Juliet', "A Midsummer Night's Dream", 'Julius Caesar'],
+            ['As You Like It', "Shall I compare thee to a summer's day?", 'As a decrepit father takes delight'],
+            ["A Lover's Complaint"],
+        ])
+
+    def test_reverse_cursor_pagination(self):
+        self.assertEqual(self.get_pages(CursorPaginationView.as_view(), o='-title'), [
+            ["Shall I compare thee to a summer's day?", 'Romeo And Juliet'],
+            ['Julius Caesar', 'As a decrepit father takes delight'],
+            ['As You Like It', "A Midsummer Night's Dream"],
+            ["A Lover's Complaint"],
+        ])
+
+    def test_invalid_cursor(self):
+        view = CursorPaginationView.as_view()
+
+        response = view(factory.get('/', {'cursor': 'not-a-cursor'})).render()
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LabelPaginationTests(MultipleModelTestCase):
+    def test_label_pagination(self):
+        view = ObjectLabelPaginationView.as_view()
+
+        with self.assertNumQueries(4):
+            response = view(factory.get('/', {'Play.limit': 3, 'Poem.offset': 2})).render()
+
+        self.assertEqual(response.data['counts'], {'Play': 4, 'Poem': 3})
+        self.assertEqual(response.data['results'], {
+            'Play': [
+                {'genre': 'Tragedy', 'title': 'Romeo And Juliet', 'year': 1597},
+                {'genre': 'Comedy', 'title': "A Midsummer Night's Dream", 'year': 1600},
+                {'genre': 'Tragedy', 'title': 'Julius Caesar', 'year': 1623},
+            ],
+            'Poem': [
+                {'title': "A Lover's Complaint", 'style': 'Narrative'},
+            ],
+        })
+        self.assertEqual(response.data['next'], {
+            'Play': 'http://testserver/?Play.limit=3&Play.offset=3&Poem.offset=2',
+            'Poem': None,
+        })
+        self.assertEqual(response.data['previous'], {
+            'Play': None,
+            'Poem': 'http://testserver/?Play.limit=3&Poem.limit=2',
+        })
+
+    def test_no_default_limit(self):
+        """
+        Without a default limit, the response is paginated if any of the labels is
+        """
+        view = ObjectLabelPaginationView.as_view(
+            pagination_class=type('NoDefaultLabelPagination', (LabelLimitPagination,), {'default_limit': None})
+        )
+
+        for label, other_label in (('Play', 'Poem'), ('Poem', 'Play')):
+            response = view(factory.get('/', {'{}.limit'.format(label): 1})).render()
+
+            self.assertEqual(list(response.data['counts']), [label])
+            self.assertEqual(len(response.data['results'][label]), 1)
+            self.assertEqual(len(response.data['results'][other_label]), 4 if other_label == 'Play' else 3)
+            self.assertEqual(
+                response.data['next'][label], 'http://testserver/?{0}.limit=1&{0}.offset=1'.format(label)
+            )
+
+        response = view(factory.get('/')).render()
+        self.assertEqual(list(response.data), ['Play', 'Poem'])
+
+    def test_default_parameters(self):
+        """
+        Labels without their own parameters use the regular limit/offset
+        """
+        view = ObjectLabelPaginationView.as_view()
+
+        response = view(factory.get('/', {'offset': 1, 'Poem.limit': 1})).render()
+
+        self.assertEqual([play['title'] for play in response.data['results']['Play']], [
+            "A Midsummer Night's Dream", 'Julius Caesar'
+        ])
+        self.assertEqual([poem['title'] for poem in response.data['results']['Poem']], [
+            "As a decrepit father takes delight"
+        ])
+        self.assertEqual(
+            response.data['next']['Play'], 'http://testserver/?Play.limit=2&Play.offset=3&Poem.limit=1&offset=1'
+        )
+
+    def test_empty_window(self):
+        """
+        Labels with a limit of 0 are neither fetched nor counted
+        """
+        view = ObjectLabelPaginationView.as_view()
+
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'Poem.limit': 0, 'Play.offset': 2})).render()
+
+        self.assertEqual(response.data['counts'], {'Play': 4})
+        self.assertEqual(len(response.data['results']['Play']), 2)
+        self.assertEqual(response.data['results']['Poem'], [])
+        self.assertEqual(list(response.data['next']), ['Play'])
+
+    def test_cached_items(self):
+        cache.clear()
+        view = CachedObjectLabelPaginationView.as_view()
+
+        response = view(factory.get('/', {'Poem.offset': 2})).render()
+
+        with self.assertNumQueries(0):
+            cached_response = view(factory.get('/', {'Poem.offset': 2})).render()
+
+        self.assertEqual(cached_response.data, response.data)
+
+        # Only the Poem page changes, the Play item is still cached
+        with self.assertNumQueries(2):
+            response = view(factory.get('/', {'Poem.offset': 1})).render()
+
+        self.assertEqual(response.data['results']['Play'], cached_response.data['results']['Play'])
+
+    def test_uncounted(self):
+        class UncountedLabelPaginationView(ObjectLabelPaginationView):
+            pagination_class = type('UncountedLabelPagination', (LabelLimitPagination,), {'include_counts': False})
+
+        params = {'Play.limit': 3, 'Poem.offset': 2}
+        response = ObjectLabelPaginationView.as_view()(factory.get('/', params)).render()
+
+        uncounted_response = UncountedLabelPaginationView.as_view()(factory.get('/', params)).render()
+        self.assertNotIn('counts', uncounted_response.data)
+        self.assertEqual(uncounted_response.data['next'], response.data['next'])
+        self.assertEqual(uncounted_response.data['previous'], response.data['previous'])
+
+    def test_flat_view(self):
+        class FlatLabelPaginationView(FlatLimitPaginationView):
+            pagination_class = LabelLimitPagination
+
+        with self.assertRaises(AssertionError):
+            FlatLabelPaginationView.as_view()(factory.get('/'))
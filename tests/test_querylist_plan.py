@@ -0,0 +1,174 @@
+from unittest import mock
+
+from django.conf.urls import url
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from .utils import MultipleModelTestCase
+from .models import Play, Poem
+from .serializers import PlaySerializer, PoemSerializer
+from drf_multiple_model.checks import check_querylists
+from drf_multiple_model.mixins import BaseMultipleModelMixin, FlatMultipleModelMixin
+from drf_multiple_model.views import FlatMultipleModelAPIView, ObjectMultipleModelAPIView
+
+
+factory = APIRequestFactory()
+
+
+class PlannedFlatView(FlatMultipleModelAPIView):
+    sorting_fields = ['-type', 'title']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style='Sonnet'), 'serializer_class': PoemSerializer, 'label': 'Sonnet'},
+    )
+
+
+class PlannedObjectView(ObjectMultipleModelAPIView):
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.all(), 'serializer_class': PoemSerializer},
+    )
+
+
+class DynamicFlatView(PlannedFlatView):
+    def get_querylist(self):
+        return PlannedFlatView.querylist
+
+
+class InvalidObjectView(ObjectMultipleModelAPIView):
+    querylist = (
+        {'queryset': Play.objects.all()},
+    )
+
+
+urlpatterns = [
+    url(r'^flat/$', PlannedFlatView.as_view()),
+    url(r'^object/$', PlannedObjectView.as_view()),
+    url(r'^invalid/$', InvalidObjectView.as_view()),
+]
+
+
+class QuerylistPlanTests(MultipleModelTestCase):
+    def setUp(self):
+        super(QuerylistPlanTests, self).setUp()
+
+        # Start every test with a fresh plan
+        for view_class in (PlannedFlatView, PlannedObjectView, DynamicFlatView):
+            if '_querylist_plan' in view_class.__dict__:
+                del view_class._querylist_plan
+
+    def test_compiled_once(self):
+        """
+        Static querylists are checked once per view class, rather than on every request
+        """
+        view = PlannedObjectView.as_view()
+        check_query_data = BaseMultipleModelMixin.check_query_data
+
+        with mock.patch.object(BaseMultipleModelMixin, 'check_query_data', autospec=True,
+                               side_effect=check_query_data) as check:
+            response = view(factory.get('/')).render()
+            view(factory.get('/')).render()
+            view(factory.get('/', {'types': 'Poem'})).render()
+
+        self.assertEqual(list(response.data), ['Play', 'Poem'])
+
+        plan = PlannedObjectView._querylist_plan
+        self.assertEqual(plan.labels, ('Play', 'Poem'))
+        with self.assertRaises(TypeError):
+            plan.querylist[0]['label'] = 'Drama'
+
+        # Only the items of the class's querylist were checked, the compiled items are skipped
+        checked = [call[0][1] for call in check.call_args_list if isinstance(call[0][1], dict)]
+        self.assertEqual(checked, list(PlannedObjectView.querylist))
+        self.assertIs(PlannedObjectView._querylist_plan, plan)
+
+    def test_labels_compiled_once(self):
+        """
+        The labels of a static querylist are looked up in the plan, rather than computed again
+        for each item of every request
+        """
+        view = PlannedFlatView.as_view()
+        view(factory.get('/')).render()
+
+        get_label = FlatMultipleModelMixin.get_label
+        with mock.patch.object(FlatMultipleModelMixin, 'get_label', autospec=True, side_effect=get_label) as label:
+            response = view(factory.get('/')).render()
+
+        self.assertEqual([datum['type'] for datum in response.data], ['Sonnet'] * 2 + ['Play'] * 4)
+        self.assertFalse(label.called)
+
+    def test_recompiled(self):
+        """
+        Replacing the querylist (or sorting fields) compiles the plan again
+        """
+        view = PlannedFlatView.as_view()
+        view(factory.get('/')).render()
+        plan = PlannedFlatView._querylist_plan
+
+        with mock.patch.object(PlannedFlatView, 'sorting_fields', ['title']):
+            response = view(factory.get('/')).render()
+
+        self.assertIsNot(PlannedFlatView._querylist_plan, plan)
+        self.assertEqual(PlannedFlatView._querylist_plan.sorting_fields, (('title', False),))
+        self.assertEqual(response.data[0]['title'], "A Midsummer Night's Dream")
+
+    def test_sorting_fields(self):
+        """
+        Static sorting fields are parsed once, while the sorting parameter is parsed per request
+        """
+        view = PlannedFlatView.as_view()
+        parse_sorting_fields = FlatMultipleModelMixin.parse_sorting_fields
+
+        with mock.patch.object(FlatMultipleModelMixin, 'parse_sorting_fields', autospec=True,
+                               side_effect=parse_sorting_fields) as parse:
+            response = view(factory.get('/')).render()
+            view(factory.get('/')).render()
+            self.assertEqual(parse.call_count, 1)
+
+            sorted_response = view(factory.get('/', {'o': 'title'})).render()
+            self.assertEqual(parse.call_count, 2)
+
+        self.assertEqual(PlannedFlatView._querylist_plan.sorting_fields, (('type', True), ('title', False)))
+        self.assertEqual([datum['title'] for datum in response.data][:3], [
+            'As a decrepit father takes delight',
+            "Shall I compare thee to a summer's day?",
+            "A Midsummer Night's Dream",
+        ])
+        self.assertEqual(sorted_response.data[0]['title'], "A Midsummer Night's Dream")
+
+    def test_dynamic_querylist(self):
+        """
+        Querylists from `get_querylist()` are still checked on every request
+        """
+        view = DynamicFlatView.as_view()
+
+        response = view(factory.get('/', {'types': 'Sonnet'})).render()
+
+        self.assertNotIn('_querylist_plan', DynamicFlatView.__dict__)
+        self.assertEqual(len(response.data), 2)
+
+    def test_serializer_context(self):
+        """
+        The serializer context is only built once per request
+        """
+        view = PlannedFlatView.as_view()
+
+        with mock.patch.object(PlannedFlatView, 'get_serializer_context', autospec=True,
+                               return_value={}) as get_context:
+            view(factory.get('/')).render()
+
+        self.assertEqual(get_context.call_count, 1)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_system_check(self):
+        """
+        Invalid querylists of routed views are reported at startup
+        """
+        errors = check_querylists()
+
+        self.assertEqual([error.obj for error in errors], [InvalidObjectView])
+        self.assertEqual(errors[0].id, 'drf_multiple_model.E001')
+        self.assertEqual(errors[0].msg, (
+            'All items in the InvalidObjectView querylist attribute should contain a `serializer_class` key'
+        ))
+        self.assertIn('_querylist_plan', PlannedFlatView.__dict__)
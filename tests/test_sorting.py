@@ -0,0 +1,131 @@
+from datetime import date
+from unittest import mock, skipIf
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+
+from drf_multiple_model.sorting import NumpySortPlan, SortPlan, numpy
+
+
+RESULTS = [
+    {'title': 'Romeo And Juliet', 'year': 1597, 'author': {'name': 'Shakespeare', 'born': {'year': 1564}}},
+    {'title': 'Doctor Faustus', 'year': 1592, 'author': {'name': 'Marlowe', 'born': {'year': 1564}}},
+    {'title': 'Julius Caesar', 'year': 1623, 'author': {'name': 'Shakespeare', 'born': {'year': 1564}}},
+    {'title': 'Every Man in His Humour', 'year': 1598, 'author': {'name': 'Jonson', 'born': {'year': 1572}}},
+]
+
+
+class SortPlanTests(SimpleTestCase):
+    def get_titles(self, sorting_fields):
+        return [datum['title'] for datum in SortPlan(sorting_fields).sort(RESULTS)]
+
+    def test_single_field(self):
+        self.assertEqual(self.get_titles([('year', False)]), [
+            'Doctor Faustus', 'Romeo And Juliet', 'Every Man in His Humour', 'Julius Caesar',
+        ])
+        self.assertEqual(self.get_titles([('title', True)]), [
+            'Romeo And Juliet', 'Julius Caesar', 'Every Man in His Humour', 'Doctor Faustus',
+        ])
+
+    def test_mixed_directions(self):
+        """
+        Ascending and descending fields (numbers as well as strings) are sorted on at once
+        """
+        self.assertEqual(self.get_titles([('author__name', True), ('year', False)]), [
+            'Romeo And Juliet', 'Julius Caesar', 'Doctor Faustus', 'Every Man in His Humour',
+        ])
+        self.assertEqual(self.get_titles([('author__born__year', True), ('title', False)]), [
+            'Every Man in His Humour', 'Doctor Faustus', 'Julius Caesar', 'Romeo And Juliet',
+        ])
+
+    def test_stable(self):
+        """
+        Data with equal sort values keeps its order, whichever the direction
+        """
+        self.assertEqual(self.get_titles([('author__born__year', False)]), [
+            'Romeo And Juliet', 'Doctor Faustus', 'Julius Caesar', 'Every Man in His Humour',
+        ])
+        self.assertEqual(self.get_titles([('author__born__year', True)]), [
+            'Every Man in His Humour', 'Romeo And Juliet', 'Doctor Faustus', 'Julius Caesar',
+        ])
+
+    def test_key(self):
+        plan = SortPlan([('author__name', False), ('year', True)])
+
+        self.assertEqual(sorted(RESULTS, key=plan.key), plan.sort(RESULTS))
+
+    def test_select(self):
+        """
+        Selecting the first few results is the same as sorting them all
+        """
+        for sorting_fields in (
+            [('year', False)],
+            [('year', True)],
+            [('author__name', True), ('year', False)],
+            [('author__born__year', True), ('title', False)],
+            [('author__born__year', False)],
+        ):
+            plan = SortPlan(sorting_fields)
+            for count in range(len(RESULTS) + 2):
+                self.assertEqual(plan.select(RESULTS, count), plan.sort(RESULTS)[:count])
+
+    def test_invalid_fields(self):
+        with self.assertRaisesMessage(ValidationError, 'Invalid sorting field: author.born.month'):
+            SortPlan([('author__born__month', False)]).sort(RESULTS)
+
+        results = RESULTS + [{'title': 'Anonymous', 'year': 1600, 'author': [{'name': 'Unknown'}]}]
+        with self.assertRaisesMessage(ValidationError, 'Corresponding data item is a list: author.name'):
+            SortPlan([('author__name', False)]).sort(results)
+
+        with self.assertRaisesMessage(ValidationError, 'Corresponding data item is a list: author'):
+            SortPlan([('author', False)]).sort(results)
+
+
+@skipIf(numpy is None, 'NumPy is not installed')
+class NumpySortPlanTests(SimpleTestCase):
+    def assertSortsLikeSortPlan(self, results, sorting_fields):
+        self.assertEqual(NumpySortPlan(sorting_fields).sort(results), SortPlan(sorting_fields).sort(results))
+
+    def test_sort(self):
+        for sorting_fields in (
+            [('year', False)],
+            [('year', True)],
+            [('title', True)],
+            [('author__name', True), ('year', False)],
+            [('author__born__year', True), ('title', False)],
+            [('author__born__year', False), ('author__name', True)],
+        ):
+            self.assertSortsLikeSortPlan(RESULTS, sorting_fields)
+
+    def test_lexsort(self):
+        results = [dict(datum, score=float(datum['year'] % 7)) for datum in RESULTS]
+
+        with mock.patch('drf_multiple_model.sorting.numpy.lexsort', side_effect=numpy.lexsort) as lexsort:
+            self.assertSortsLikeSortPlan(results, [('score', True), ('year', False)])
+
+        self.assertTrue(lexsort.called)
+
+    def test_python_fallback(self):
+        """
+        Sort values that NumPy can't sort (as python does) are sorted in python
+        """
+        for values in (
+            ['b', 'a', 'b' * 1000, 'c'],
+            [date(1600, 1, 1), date(1500, 1, 1), date(1600, 1, 1), date(1550, 1, 1)],
+            [1, 2 ** 70, 3, 2],
+            [1, 2.5, 3, 2 ** 70],
+            [2 ** 53 + 1, 2 ** 53, 0.5, 1],
+        ):
+            results = [dict(datum, value=value) for datum, value in zip(RESULTS, values)]
+
+            with mock.patch('drf_multiple_model.sorting.numpy.lexsort') as lexsort:
+                self.assertSortsLikeSortPlan(results, [('value', False), ('title', False)])
+
+            self.assertFalse(lexsort.called)
+
+        with mock.patch('drf_multiple_model.sorting.numpy', None):
+            self.assertSortsLikeSortPlan(RESULTS, [('year', True)])
+
+    def test_invalid_fields(self):
+        with self.assertRaisesMessage(ValidationError, 'Invalid sorting field: author.born.month'):
+            NumpySortPlan([('author__born__month', False)]).sort(RESULTS)
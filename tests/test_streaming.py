@@ -0,0 +1,172 @@
+import json
+
+from django.http import StreamingHttpResponse
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework import renderers
+
+from .utils import MultipleModelTestCase
+from .models import Author, Play, Poem
+from .serializers import AuthorListSerializer, PlaySerializer, PlayTitleAsNameSerializer, PoemSerializer
+from drf_multiple_model.pagination import MultipleModelLimitOffsetPagination
+from drf_multiple_model.renderers import MultipleModelJSONRenderer
+from drf_multiple_model.views import FlatMultipleModelAPIView, ObjectMultipleModelAPIView
+
+
+factory = APIRequestFactory()
+
+# The browsable API needs a url conf
+urlpatterns = []
+
+
+class StreamingFlatView(FlatMultipleModelAPIView):
+    renderer_classes = (MultipleModelJSONRenderer, renderers.BrowsableAPIRenderer)
+    streaming = True
+    streaming_chunk_size = 3
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+    )
+
+
+class SortedStreamingFlatView(StreamingFlatView):
+    sorting_fields = ['title']
+
+
+class SerializerSortedStreamingFlatView(StreamingFlatView):
+    # `name` only exists in the serialized data, so it can't be sorted by in the database
+    sorting_fields = ['name']
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlayTitleAsNameSerializer},
+    )
+
+
+class StreamingObjectView(ObjectMultipleModelAPIView):
+    renderer_classes = (MultipleModelJSONRenderer,)
+    streaming = True
+    streaming_chunk_size = 3
+    querylist = (
+        {'queryset': Play.objects.all(), 'serializer_class': PlaySerializer},
+        {'queryset': Poem.objects.filter(style="Sonnet"), 'serializer_class': PoemSerializer},
+        {'queryset': Poem.objects.filter(style="Limerick"), 'serializer_class': PoemSerializer, 'label': 'Limerick'},
+    )
+
+
+class PaginatedStreamingObjectView(StreamingObjectView):
+    pagination_class = MultipleModelLimitOffsetPagination
+
+
+class PrefetchedStreamingFlatView(StreamingFlatView):
+    querylist = (
+        {'queryset': Author.objects.prefetch_related('plays', 'poems'), 'serializer_class': AuthorListSerializer},
+    )
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class StreamingTests(MultipleModelTestCase):
+    def get_content(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        return json.loads(b''.join(response.streaming_content).decode('utf-8'))
+
+    def test_streaming_flat_view(self):
+        response = StreamingFlatView.as_view()(factory.get('/'))
+
+        # Nothing is queried until the response is read
+        with self.assertNumQueries(2):
+            content = self.get_content(response)
+
+        self.assertEqual(content, [
+            {'genre': 'Tragedy', 'title': 'Romeo And Juliet', 'year': 1597, 'type': 'Play'},
+            {'genre': 'Comedy', 'title': "A Midsummer Night's Dream", 'year': 1600, 'type': 'Play'},
+            {'genre': 'Tragedy', 'title': 'Julius Caesar', 'year': 1623, 'type': 'Play'},
+            {'genre': 'Comedy', 'title': 'As You Like It', 'year': 1623, 'type': 'Play'},
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
+            {'title': "As a decrepit father takes delight", 'style': 'Sonnet', 'type': 'Poem'},
+        ])
+
+    def test_prefetched_streaming(self):
+        """
+        Related objects are prefetched for each chunk, since `.iterator()` doesn't prefetch
+        """
+        response = PrefetchedStreamingFlatView.as_view()(factory.get('/'))
+
+        # One query for the authors, and two prefetches for each of the 3 chunks
+        with self.assertNumQueries(7):
+            content = self.get_content(response)
+
+        self.assertEqual(len(content), 7)
+        self.assertEqual(content[0]['plays'], [
+            {'genre': 'Tragedy', 'title': 'Romeo And Juliet', 'year': 1597},
+        ])
+
+    def test_sorted_streaming_flat_view(self):
+        """
+        Sorted results are merged from querysets sorted by the database
+        """
+        view = SortedStreamingFlatView.as_view()
+
+        response = view(factory.get('/'))
+        self.assertEqual([datum['title'] for datum in self.get_content(response)], [
+            "A Midsummer Night's Dream",
+            'As You Like It',
+            'As a decrepit father takes delight',
+            'Julius Caesar',
+            'Romeo And Juliet',
+            "Shall I compare thee to a summer's day?",
+        ])
+
+        response = view(factory.get('/', {'o': 'type,-title'}))
+
+        self.assertEqual([(datum['type'], datum['title']) for datum in self.get_content(response)], [
+            ('Play', 'Romeo And Juliet'),
+            ('Play', 'Julius Caesar'),
+            ('Play', 'As You Like It'),
+            ('Play', "A Midsummer Night's Dream"),
+            ('Poem', "Shall I compare thee to a summer's day?"),
+            ('Poem', "As a decrepit father takes delight"),
+        ])
+
+    def test_streaming_object_view(self):
+        response = StreamingObjectView.as_view()(factory.get('/'))
+
+        self.assertEqual(self.get_content(response), {
+            'Play': [
+                {'title': 'Romeo And Juliet', 'genre': 'Tragedy', 'year': 1597},
+                {'title': "A Midsummer Night's Dream", 'genre': 'Comedy', 'year': 1600},
+                {'title': 'Julius Caesar', 'genre': 'Tragedy', 'year': 1623},
+                {'title': 'As You Like It', 'genre': 'Comedy', 'year': 1623},
+            ],
+            'Poem': [
+                {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet'},
+                {'title': "As a decrepit father takes delight", 'style': 'Sonnet'}
+            ],
+            'Limerick': [],
+        })
+
+    def test_not_streamed(self):
+        """
+        Paginated responses, and other renderers, aren't streamed
+        """
+        response = PaginatedStreamingObjectView.as_view()(factory.get('/', {'limit': 2})).render()
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(len(response.data['results']['Play']), 2)
+
+        response = StreamingFlatView.as_view()(factory.get('/', {'format': 'api'})).render()
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(len(response.data), 6)
+
+    def test_not_streamed_sorting(self):
+        """
+        Responses that aren't streamed are sorted as usual, rather than by the database
+        """
+        response = SerializerSortedStreamingFlatView.as_view()(factory.get('/', {'format': 'api'})).render()
+
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertEqual([datum['name'] for datum in response.data], [
+            "A Midsummer Night's Dream",
+            'As You Like It',
+            'Julius Caesar',
+            'Romeo And Juliet',
+        ])
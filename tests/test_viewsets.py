@@ -1,3 +1,6 @@
+import gzip
+import json
+
 from django.test import override_settings
 from rest_framework.test import APIClient
 from rest_framework import routers, status
@@ -5,7 +8,9 @@ from rest_framework import routers, status
 from .utils import MultipleModelTestCase
 from .models import Play, Poem
 from .serializers import PlaySerializer, PoemSerializer
+from drf_multiple_model.mixins import ExportMultipleModelMixin
 from drf_multiple_model.viewsets import FlatMultipleModelAPIViewSet, ObjectMultipleModelAPIViewSet
+from drf_multiple_model.pagination import MultipleModelCursorPagination
 
 
 class FlatViewSet(FlatMultipleModelAPIViewSet):
@@ -22,10 +27,26 @@ class ObjectViewSet(ObjectMultipleModelAPIViewSet):
     )
 
 
+class CursorPagination(MultipleModelCursorPagination):
+    page_size = 4
+
+
+class CursorFlatViewSet(FlatViewSet):
+    pagination_class = CursorPagination
+    sorting_fields = ['-title']
+
+
+class ExportViewSet(ExportMultipleModelMixin, ObjectViewSet):
+    export_chunk_size = 3
+    export_gzip = True
+
+
 # Routers for testing viewset
 router = routers.SimpleRouter()
 router.register(r'flat', FlatViewSet, base_name='flat')
 router.register(r'object', ObjectViewSet, base_name='object')
+router.register(r'cursor', CursorFlatViewSet, base_name='cursor')
+router.register(r'export', ExportViewSet, base_name='export')
 
 urlpatterns = router.urls
 
@@ -74,3 +95,67 @@ class TestMMObjectViews(MultipleModelTestCase):
             {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
             {'title': "As a decrepit father takes delight", 'style': 'Sonnet', 'type': 'Poem'},
         ])
+
+    def test_cursor_paginated_flat_viewset(self):
+        """
+        Tests the FlatMultipleModelAPIViewSet with cursor pagination
+        """
+        client = APIClient()
+        response = client.get('/cursor/', format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            "Shall I compare thee to a summer's day?",
+            'Romeo And Juliet',
+            'Julius Caesar',
+            'As a decrepit father takes delight',
+        ])
+
+        response = client.get(response.data['next'], format='json')
+        self.assertEqual([datum['title'] for datum in response.data['results']], [
+            'As You Like It',
+            "A Midsummer Night's Dream",
+        ])
+        self.assertEqual(response.data['next'], None)
+
+    def test_ndjson_export(self):
+        client = APIClient()
+        response = client.get('/export/export/', {'format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="export.ndjson"')
+
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'title': 'Romeo And Juliet', 'genre': 'Tragedy', 'year': 1597, 'type': 'Play'},
+            {'title': "A Midsummer Night's Dream", 'genre': 'Comedy', 'year': 1600, 'type': 'Play'},
+            {'title': 'Julius Caesar', 'genre': 'Tragedy', 'year': 1623, 'type': 'Play'},
+            {'title': 'As You Like It', 'genre': 'Comedy', 'year': 1623, 'type': 'Play'},
+            {'title': "Shall I compare thee to a summer's day?", 'style': 'Sonnet', 'type': 'Poem'},
+            {'title': "As a decrepit father takes delight", 'style': 'Sonnet', 'type': 'Poem'},
+        ])
+
+    def test_csv_export(self):
+        client = APIClient()
+        response = client.get('/export/export/', {'format': 'csv'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8').splitlines(), [
+            'type,genre,title,year,style',
+            'Play,Tragedy,Romeo And Juliet,1597,',
+            "Play,Comedy,A Midsummer Night's Dream,1600,",
+            'Play,Tragedy,Julius Caesar,1623,',
+            'Play,Comedy,As You Like It,1623,',
+            "Poem,,Shall I compare thee to a summer's day?,,Sonnet",
+            'Poem,,As a decrepit father takes delight,,Sonnet',
+        ])
+
+    def test_gzipped_export(self):
+        client = APIClient()
+        response = client.get('/export/export/', {'format': 'csv'}, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        content = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        self.assertEqual(len(content.splitlines()), 7)
@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.core.cache import cache
 
 from .models import Play, Poem, Author
@@ -41,3 +41,11 @@ class MultipleModelTestCase(TestCase):
                  style="Narrative",
                  author=Author.objects.create(name='Poem Shakespeare 3'))
         ])
+
+
+class MultipleModelTransactionTestCase(TransactionTestCase):
+    """
+    MultipleModelTestCase for tests that query the database from other threads,
+    which can't see the data inside of a test transaction
+    """
+    setUp = MultipleModelTestCase.setUp